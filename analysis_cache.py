@@ -0,0 +1,149 @@
+import os
+import json
+import shutil
+import hashlib
+import time
+import threading
+import uuid
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, "analysis_cache")
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3  # 4 GB
+
+ARRAY_KEYS = ('f0', 'sp', 'ap')
+STALE_TMP_SECONDS = 3600 # .tmp_* dirs older than this are leftovers of a crashed write
+
+
+def file_digest(filepath, chunk_size=1 << 20):
+    """SHA-1 of the file content (path/mtime independent)."""
+    h = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """
+    On-disk cache for WORLD analysis results (f0 / sp / ap).
+    Each entry is a directory of .npy files that are loaded memory-mapped,
+    so a hit costs almost nothing. Total size is bounded with LRU eviction
+    (directory mtime = last use).
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, digest, sr, frame_period, target_len=None, **extra):
+        parts = [digest, f"sr{int(sr)}", f"fp{float(frame_period):g}"]
+        if target_len is not None:
+            parts.append(f"len{int(target_len)}")
+        for k in sorted(extra):
+            parts.append(f"{k}{extra[k]}")
+        return hashlib.sha1("_".join(parts).encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        path = self._entry_dir(key)
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            # Entry dir without meta.json (partial rmtree / manual deletion): drop it,
+            # otherwise put() would never store this key again
+            if os.path.isdir(path): shutil.rmtree(path, ignore_errors=True)
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            data = {k: np.load(os.path.join(path, f"{k}.npy"), mmap_mode='r') for k in ARRAY_KEYS}
+            data['len'] = meta['len']
+            # Touch for LRU
+            try: os.utime(path, None)
+            except OSError: pass
+            return data
+        except Exception:
+            # Broken entry (partial write / manual deletion) -> drop it
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def put(self, key, data):
+        path = self._entry_dir(key)
+        if os.path.exists(os.path.join(path, "meta.json")): return
+        # Leftover of a broken entry (see get)
+        if os.path.exists(path): shutil.rmtree(path, ignore_errors=True)
+        # Write to a private temp dir first, then rename (atomic on the same volume)
+        tmp = os.path.join(self.cache_dir, f".tmp_{key}_{uuid.uuid4().hex}")
+        try:
+            os.makedirs(tmp)
+            for k in ARRAY_KEYS:
+                np.save(os.path.join(tmp, f"{k}.npy"), np.ascontiguousarray(data[k]))
+            with open(os.path.join(tmp, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump({'len': int(data['len'])}, f)
+            os.rename(tmp, path)
+        except OSError:
+            # Another process/thread stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(".tmp_"): continue
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(path): continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                pass
+        return entries
+
+    def total_bytes(self):
+        return sum(e[1] for e in self._entries())
+
+    def _remove_stale_tmp(self):
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.startswith(".tmp_"): continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if now - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def evict(self):
+        with self._lock:
+            self._remove_stale_tmp()
+            entries = self._entries()
+            total = sum(e[1] for e in entries)
+            if total <= self.max_bytes: return
+            entries.sort()  # oldest first
+            for _, size, path in entries:
+                if total <= self.max_bytes: break
+                # Mapped files can't be removed on Windows; skip those
+                shutil.rmtree(path, ignore_errors=True)
+                if not os.path.exists(path):
+                    total -= size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                shutil.rmtree(path, ignore_errors=True)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_default_cache():
+    """Shared process-wide cache instance (engines created per batch iteration reuse it)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = AnalysisCache()
+        return _default_cache
@@ -2,14 +2,268 @@ import librosa
 import numpy as np
 import soundfile as sf
 import os
+import threading
 import scipy.signal
+import scipy.fft
 import pyworld as pw
+from concurrent.futures import ProcessPoolExecutor, Future
 from scipy.interpolate import PchipInterpolator
+from analysis_cache import file_digest, get_default_cache
+from effect_chain import EffectChain, FxBuffers
+from output_writer import trim_silence
+from profiler import stage as profile_stage
+from trajectories import trajectory, weight_table, bilinear_weights
+from processors import formant_matrix
+
+SLOTS = ('a', 'b', 'c', 'd')
+
+# Analysis profiles: F0 estimator + frame period
+#   quality     : harvest (robust, slow)
+#   fast        : dio + stonemask (several times faster, mass batch)
+#   fast_coarse : dio + stonemask at 10ms frames (half the frames to analyze/morph/synthesize)
+ANALYSIS_PROFILES = {
+    "quality":     {"f0_method": "harvest", "frame_period": 5.0},
+    "fast":        {"f0_method": "dio", "frame_period": 5.0},
+    "fast_coarse": {"f0_method": "dio", "frame_period": 10.0},
+}
+
+# ==================== ANALYSIS (process-pool safe) ====================
+# Module-level so they can be pickled into worker processes.
+
+def world_analyze(y, sr, frame_period, f0_method="harvest", dtype="float64"):
+    # pyworld works in float64; results are stored in the engine precision (dtype)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    try:
+        if f0_method == "dio":
+            _f0, t = pw.dio(y, sr, frame_period=frame_period)
+            _f0 = pw.stonemask(y, _f0, t, sr)
+        else:
+            _f0, t = pw.harvest(y, sr, frame_period=frame_period)
+        _sp = pw.cheaptrick(y, _f0, t, sr)
+        _ap = pw.d4c(y, _f0, t, sr)
+        return {'f0': _f0.astype(dtype, copy=False), 'sp': _sp.astype(dtype, copy=False),
+                'ap': _ap.astype(dtype, copy=False), 'len': len(y)}
+    except: return None
+
+def align_frames(data, num_frames, target_len, pos=None):
+    """
+    Aligns WORLD params analyzed at native length to num_frames master frames
+    by resampling the frame sequences (linear sp/ap, f0 linear between voiced
+    frames and nearest-neighbour across voicing boundaries).
+    pos: fractional source frame per master frame (e.g. a DTW warp), default linear.
+    """
+    f0, sp, ap = data['f0'], data['sp'], data['ap']
+    n_src = len(f0)
+    if pos is None:
+        if n_src == num_frames:
+            return {'f0': f0, 'sp': sp, 'ap': ap, 'len': target_len}
+        pos = np.linspace(0, n_src - 1, num_frames)
+    i0 = np.floor(pos).astype(np.int64)
+    i1 = np.minimum(i0 + 1, n_src - 1)
+    w = pos - i0
+    
+    def lerp(m):
+        wm = w.astype(m.dtype)[:, None]
+        out = m[i0] * (1 - wm)
+        out += m[i1] * wm
+        return out
+    
+    voiced = (f0[i0] > 0) & (f0[i1] > 0)
+    nearest = np.where(w < 0.5, i0, i1)
+    f0_out = np.where(voiced, f0[i0] * (1.0 - w) + f0[i1] * w, f0[nearest])
+    return {'f0': f0_out, 'sp': lerp(sp), 'ap': lerp(ap), 'len': target_len}
+
+def dtw_features(data, sr, dims=20):
+    """Compact per-frame timbre features: mel-cepstrum of sp without c0 (level independent)."""
+    # pyworld needs writable buffers (cache hits are read-only memmaps)
+    sp = np.require(data['sp'], dtype=np.float64, requirements=['C', 'W'])
+    return pw.code_spectral_envelope(sp, sr, dims + 1)[:, 1:]
+
+def dtw_path(A, B, band=0.15):
+    """
+    DTW between feature sequences A (master, n frames) and B (m frames).
+    Banded (Sakoe-Chiba around the linear path) and evaluated one
+    anti-diagonal at a time, so every step is a vectorized min over the band.
+    Returns the warp path as two index arrays (i into A, j into B).
+    """
+    n, m = len(A), len(B)
+    slope = (m - 1) / max(1, n - 1)
+    R = max(2, int(band * max(n, m)))
+    
+    def take(prev, idx):
+        lo, arr = prev
+        out = np.full(len(idx), np.inf)
+        ok = (idx >= lo) & (idx < lo + len(arr))
+        out[ok] = arr[idx[ok] - lo]
+        return out
+    
+    lows, steps = [], []
+    prev2 = prev = (0, np.empty(0))
+    for k in range(n + m - 1):
+        # Cells (i, k-i) of this anti-diagonal that lie inside the band
+        lo = max(0, k - m + 1, int(np.ceil((k - R) / (1 + slope))))
+        hi = min(n - 1, k, int(np.floor((k + R) / (1 + slope))))
+        i = np.arange(lo, hi + 1)
+        cost = np.sqrt(np.sum((A[i] - B[k - i]) ** 2, axis=1))
+        if k == 0:
+            acc = cost
+            step = np.zeros(len(i), dtype=np.int8)
+        else:
+            # 0: (i-1, j-1)  1: (i-1, j)  2: (i, j-1)
+            cand = np.stack((take(prev2, i - 1), take(prev, i - 1), take(prev, i)))
+            step = np.argmin(cand, axis=0).astype(np.int8)
+            acc = cost + cand[step, np.arange(len(i))]
+        lows.append(lo); steps.append(step)
+        prev2, prev = prev, (lo, acc)
+    
+    # Backtrack from the end cell
+    i, j = n - 1, m - 1
+    path_i, path_j = [i], [j]
+    while i > 0 or j > 0:
+        s = steps[i + j][i - lows[i + j]]
+        if s == 0: i -= 1; j -= 1
+        elif s == 1: i -= 1
+        else: j -= 1
+        path_i.append(i); path_j.append(j)
+    return np.array(path_i[::-1]), np.array(path_j[::-1])
+
+def warp_positions(path_i, path_j, n):
+    """Fractional source frame for every master frame (mean of the matched frames)."""
+    counts = np.bincount(path_i, minlength=n)
+    return np.bincount(path_i, weights=path_j, minlength=n) / np.maximum(counts, 1)
+
+_warp_cache = {}
+_warp_cache_lock = threading.Lock()
+_WARP_CACHE_SIZE = 64
+
+def synthesize_job(f0, sp, ap, sr, frame_period, dtype="float64"):
+    """Worker entry point: WORLD synthesis."""
+    return pw.synthesize(f0, sp, ap, sr, frame_period=frame_period).astype(dtype, copy=False)
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def get_worker_pool():
+    """Shared process pool for WORLD analysis/synthesis (created on first use)."""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            workers = max(1, min(len(SLOTS), (os.cpu_count() or 2) - 1))
+            _worker_pool = ProcessPoolExecutor(max_workers=workers)
+        return _worker_pool
+
+# ==================== REVERB IMPULSE BANK ====================
+
+class ImpulseBank:
+    """
+    Reverb impulse responses keyed by (rt60, sr, seed).
+    Each IR is generated once with a private RNG (the global NumPy RNG is left
+    alone) and its partition spectra are cached, so a reverb call only pays the
+    FFTs of the input (uniform partitioned overlap-save convolution).
+    """
+    def __init__(self, block_size=16384):
+        self.block_size = block_size
+        self._irs = {}
+        self._spectra = {}
+        self._lock = threading.Lock()
+
+    def impulse(self, rt60=2.0, sr=48000, seed=42):
+        key = (float(rt60), int(sr), int(seed))
+        with self._lock:
+            ir = self._irs.get(key)
+            if ir is None:
+                len_impulse = int(rt60 * sr)
+                t = np.linspace(0, 1, len_impulse)
+                noise = np.random.RandomState(seed).randn(len_impulse)
+                ir = noise * np.exp(-7 * t) # Decay
+                # Impulse sum roughly 1, then gain compensation
+                ir /= np.sum(np.abs(ir))
+                ir *= 1.5
+                ir.setflags(write=False)
+                self._irs[key] = ir
+            return ir
+
+    def spectra(self, rt60=2.0, sr=48000, seed=42, dtype=np.float64):
+        # (partitions, B+1) rFFTs of the IR split into block_size pieces, zero-padded to 2B
+        dtype = np.dtype(dtype)
+        key = (float(rt60), int(sr), int(seed), self.block_size, dtype.str)
+        with self._lock:
+            H = self._spectra.get(key)
+        if H is None:
+            ir = self.impulse(rt60, sr, seed)
+            B = self.block_size
+            P = -(-len(ir) // B)
+            parts = np.zeros(P * B, dtype=dtype)
+            parts[:len(ir)] = ir
+            H = scipy.fft.rfft(parts.reshape(P, B), n=2 * B, axis=1)
+            with self._lock:
+                self._spectra[key] = H
+        return H
+
+    def convolve(self, x, rt60=2.0, sr=48000, seed=42):
+        """Full convolution of x with the IR (same result as fftconvolve(x, ir, 'full'))."""
+        # float32 input stays float32 (complex64 spectra)
+        dtype = np.float32 if x.dtype == np.float32 else np.float64
+        H = self.spectra(rt60, sr, seed, dtype)
+        L = len(self.impulse(rt60, sr, seed))
+        B = self.block_size
+        n = len(x)
+        out_len = n + L - 1
+        K = -(-out_len // B)
+        
+        # Overlap-save frames: [previous block | current block]
+        xp = np.zeros((K + 1) * B, dtype=dtype)
+        xp[B:B + n] = x
+        blocks = xp.reshape(K + 1, B)
+        X = scipy.fft.rfft(np.concatenate((blocks[:-1], blocks[1:]), axis=1), axis=1)
+        
+        # Frequency-domain delay line: block k sees partition p through input block k-p
+        Y = np.zeros_like(X)
+        for p in range(min(len(H), K)):
+            Y[p:] += X[:K - p] * H[p]
+        
+        return scipy.fft.irfft(Y, n=2 * B, axis=1)[:, B:].reshape(-1)[:out_len]
+
+_impulse_bank = None
+_impulse_bank_lock = threading.Lock()
+
+def get_impulse_bank():
+    """Shared IR bank (engines created per batch iteration reuse the spectra)."""
+    global _impulse_bank
+    with _impulse_bank_lock:
+        if _impulse_bank is None:
+            _impulse_bank = ImpulseBank()
+        return _impulse_bank
 
 class AudioEngine:
-    def __init__(self):
+    def __init__(self, use_cache=True, parallel=True, profile="quality", precision="float64"):
         self.sr = 48000
-        self.frame_period = 5.0
+        # Working precision: "float64" or "float32" (loading, morph accumulation,
+        # FX and writing). pyworld calls always get float64 at the boundary.
+        self.precision = "float32" if precision == "float32" else "float64"
+        self.dtype = np.dtype(self.precision)
+        # Analysis profile (see ANALYSIS_PROFILES): sets f0_method / frame_period
+        self.profile = profile if profile in ANALYSIS_PROFILES else "quality"
+        self.f0_method = ANALYSIS_PROFILES[self.profile]["f0_method"]
+        self.frame_period = ANALYSIS_PROFILES[self.profile]["frame_period"]
+        self.reverb_rt60 = 2.0 # seconds
+        self.reverb_seed = 42
+        
+        # On-disk WORLD analysis cache (shared between engine instances)
+        self.cache = get_default_cache() if use_cache else None
+        
+        # Run slot analyses concurrently in the shared process pool
+        self.parallel = parallel
+        self._pending = {} # slot -> (future, cache_key, raw_src)
+        self._load_lock = threading.Lock()
+        self._loads_cond = threading.Condition()
+        self._loads_in_flight = 0
+        
+        # Content hashes (cache keys)
+        self.hash_a = None
+        self.hash_b = None
+        self.hash_c = None
+        self.hash_d = None
         
         # Raw Data
         self.raw_a = None
@@ -17,7 +271,14 @@ class AudioEngine:
         self.raw_c = None
         self.raw_d = None
         
-        # Analyzed
+        # Analyzed at native length (shared by every master length)
+        self.native_a = None
+        self.native_b = None
+        self.native_c = None
+        self.native_d = None
+        self._aligned_to = {} # slot -> (native, master native) data_* was built from
+        
+        # Analyzed, frame-aligned to the master (A)
         self.data_a = None
         self.data_b = None
         self.data_c = None
@@ -32,73 +293,239 @@ class AudioEngine:
         self.generated_audio = None
         self.processed_audio = None # Final output (can be stereo)
         
+        # Shaped WORLD params of the last morph(): pitch curve edits only re-run synthesis
+        self._morph_params = None
+        self._pitch_cache = None # (curve key, audio)
+        
+        # Post-FX: work buffers / oscillator tables reused across slider moves
+        self.fx_buffers = FxBuffers(dtype=self.dtype)
+        self.last_fx_timings = {}
+        # Morph accumulation buffers (per thread, see _mix_buffers)
+        self._mix_local = threading.local()
+        
         self.last_trajectory_x = None
         self.last_trajectory_y = None
+        
+        # Morph domain: "full" (sp/ap at full FFT resolution) or
+        # "coded" (mel-cepstral envelope + band aperiodicity, decoded once before synthesis)
+        self.morph_domain = "full"
+        self.coded_sp_dims = 60
+        
+        # Source -> master frame pairing: "linear" (by relative position) or
+        # "dtw" (warp path on mel-cepstral features, cached per source pair)
+        self.align_mode = "linear"
+        self.dtw_band = 0.15
+        
+        # Optional StageProfiler (profiler.py): per-stage time / peak memory of renders
+        self.profiler = None
+
+    def _stage(self, name):
+        return profile_stage(self.profiler, name)
 
     def _load_file_fast(self, filepath):
         try:
-            data, samplerate = sf.read(filepath)
+            data, samplerate = sf.read(filepath, dtype=self.precision)
             if len(data.shape) > 1: data = np.mean(data, axis=1) # Force mono for analysis source
             if samplerate != self.sr:
                 data = librosa.resample(data, orig_sr=samplerate, target_sr=self.sr)
-            return data.astype(np.float64)
+            return data.astype(self.dtype)
         except Exception:
             y, _ = librosa.load(filepath, sr=self.sr, mono=True)
-            return y.astype(np.float64)
+            return y.astype(self.dtype)
 
-    def _analyze(self, y):
-        y = np.ascontiguousarray(y.astype(np.float64))
-        try:
-            _f0, t = pw.harvest(y, self.sr, frame_period=self.frame_period)
-            _sp = pw.cheaptrick(y, _f0, t, self.sr)
-            _ap = pw.d4c(y, _f0, t, self.sr)
-            return {'f0': _f0, 'sp': _sp, 'ap': _ap, 'len': len(y)}
-        except: return None
-
-    def _align_and_analyze(self, raw_src, raw_master):
-        if raw_src is None: return None
-        if raw_master is None: return self._analyze(raw_src)
-        
-        len_src = len(raw_src)
-        len_dst = len(raw_master)
-        if len_src == 0 or len_dst == 0: return None
-        
-        rate = len_src / len_dst
-        if abs(rate - 1.0) > 0.001:
-             y_aligned = librosa.effects.time_stretch(raw_src, rate=rate)
+    def _file_hash(self, filepath):
+        if self.cache is None: return None
+        try: return file_digest(filepath)
+        except OSError: return None
+
+    def _cache_key(self, src_hash):
+        if self.cache is None or src_hash is None: return None
+        extra = {'f0': self.f0_method}
+        if self.precision != "float64": extra['dtype'] = self.precision
+        return self.cache.make_key(src_hash, self.sr, self.frame_period, **extra)
+
+    def _cache_put(self, cache_key, data):
+        if cache_key is None or data is None: return
+        try: self.cache.put(cache_key, data)
+        except Exception as e: print(f"Analysis cache write failed: {e}")
+
+    def _analyze(self, y, cache_key=None):
+        if cache_key is not None:
+            hit = self.cache.get(cache_key)
+            if hit is not None: return hit
+        data = world_analyze(y, self.sr, self.frame_period, self.f0_method, self.precision)
+        self._cache_put(cache_key, data)
+        return data
+
+    # ---------- Slot loading (parallel) ----------
+    # Every source is analyzed once at its native length (native_*); data_* are
+    # the frame-aligned views morph() uses, so a new master only costs an interpolation.
+
+    def _start_analysis(self, slot, raw_src, src_hash):
+        """Resolves a slot from the cache or submits it to the analysis pool."""
+        cache_key = self._cache_key(src_hash)
+        if cache_key is not None:
+            hit = self.cache.get(cache_key)
+            if hit is not None:
+                self._pending.pop(slot, None)
+                setattr(self, f"native_{slot}", hit)
+                self._realign_all()
+                return
+        
+        fut = None # no pool: wait_analysis() analyzes inline
+        if self.parallel:
+            try: fut = get_worker_pool().submit(world_analyze, raw_src, self.sr, self.frame_period, self.f0_method, self.precision)
+            except Exception as e: print(f"Analysis pool unavailable, running inline: {e}")
+        self._pending[slot] = (fut, cache_key, raw_src)
+
+    def _realign(self, slot):
+        native = getattr(self, f"native_{slot}")
+        master = self.native_a
+        if native is None or master is None:
+            setattr(self, f"data_{slot}", native if slot == 'a' else None)
+            return
+        # Skip if neither this source, the master nor the mode changed since the last alignment
+        prev = self._aligned_to.get(slot)
+        if prev is not None and prev[0] is native and prev[1] is master and prev[2] == self.align_mode: return
+        if slot == 'a': data = native
         else:
-             y_aligned = raw_src.copy()
-             
-        if len(y_aligned) > len_dst:
-            y_aligned = y_aligned[:len_dst]
-        elif len(y_aligned) < len_dst:
-            y_aligned = np.pad(y_aligned, (0, len_dst - len(y_aligned)))
-            
-        return self._analyze(y_aligned)
+            pos = self._warp_positions(slot, native, master) if self.align_mode == "dtw" else None
+            data = align_frames(native, len(master['f0']), master['len'], pos)
+        setattr(self, f"data_{slot}", self._source_terms(data))
+        self._aligned_to[slot] = (native, master, self.align_mode)
+
+    def _warp_positions(self, slot, native, master):
+        src_hash = getattr(self, f"hash_{slot}")
+        key = None
+        if src_hash is not None and self.hash_a is not None:
+            key = (self.hash_a, src_hash, self.sr, self.frame_period, self.f0_method, self.dtw_band)
+            with _warp_cache_lock:
+                pos = _warp_cache.get(key)
+            if pos is not None: return pos
+        
+        try:
+            path_i, path_j = dtw_path(dtw_features(master, self.sr), dtw_features(native, self.sr), self.dtw_band)
+            pos = warp_positions(path_i, path_j, len(master['f0']))
+        except Exception as e:
+            print(f"DTW alignment failed for slot {slot.upper()}, using linear: {e}")
+            return None
+        
+        if key is not None:
+            with _warp_cache_lock:
+                _warp_cache[key] = pos
+                while len(_warp_cache) > _WARP_CACHE_SIZE:
+                    _warp_cache.pop(next(iter(_warp_cache)))
+        return pos
+
+    def set_align_mode(self, mode):
+        """"linear" or "dtw"; loaded sources are re-aligned on the next wait_analysis()/morph()."""
+        if mode not in ("linear", "dtw"):
+            raise ValueError(f"Unknown align mode: {mode}")
+        self.align_mode = mode
+
+    def _realign_all(self):
+        for slot in SLOTS:
+            self._realign(slot)
+
+    def _load_slot(self, slot, filepath):
+        # Read + cache lookup / pool submission; the analysis itself is timed by wait_analysis()
+        with self._stage("load"):
+            raw = self._load_file_fast(filepath)
+            src_hash = self._file_hash(filepath)
+            with self._load_lock:
+                setattr(self, f"raw_{slot}", raw)
+                setattr(self, f"y_{slot}", raw)
+                setattr(self, f"hash_{slot}", src_hash)
+                setattr(self, f"native_{slot}", None)
+                self._start_analysis(slot, raw, src_hash)
+
+    def set_profile(self, profile):
+        """
+        Switches the analysis profile. Loaded sources are re-analyzed
+        (or pulled from the cache) in the background; morph() joins as usual.
+        """
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile: {profile}")
+        if profile == self.profile: return
+        with self._load_lock:
+            self.profile = profile
+            self.f0_method = ANALYSIS_PROFILES[profile]["f0_method"]
+            self.frame_period = ANALYSIS_PROFILES[profile]["frame_period"]
+            # Cached morph params belong to the old frame period
+            self._morph_params = None
+            self._pitch_cache = None
+            for s in SLOTS:
+                raw_s = getattr(self, f"raw_{s}")
+                setattr(self, f"native_{s}", None)
+                if raw_s is not None:
+                    self._start_analysis(s, raw_s, getattr(self, f"hash_{s}"))
+            self._realign_all()
+
+    def load_source_async(self, index, filepath):
+        """
+        Reads the file and starts the analysis without waiting for it.
+        Call wait_analysis() (morph does this automatically) to join.
+        """
+        with self._loads_cond:
+            self._loads_in_flight += 1
+        try:
+            self._load_slot(SLOTS[index], filepath)
+        finally:
+            with self._loads_cond:
+                self._loads_in_flight -= 1
+                self._loads_cond.notify_all()
+
+    def wait_analysis(self):
+        """Blocks until every pending slot analysis has finished."""
+        with self._loads_cond:
+            while self._loads_in_flight > 0:
+                self._loads_cond.wait()
+        
+        with self._load_lock:
+            pending = list(self._pending.items())
+        for slot, entry in pending:
+            fut, cache_key, raw_src = entry
+            with self._stage("analyze"):
+                data = None
+                if fut is not None:
+                    try:
+                        data = fut.result()
+                    except Exception as e:
+                        # Broken pool (e.g. worker crashed) -> fall back to inline analysis
+                        print(f"Parallel analysis failed for slot {slot.upper()}: {e}")
+                if data is None:
+                    data = world_analyze(raw_src, self.sr, self.frame_period, self.f0_method, self.precision)
+            with self._load_lock:
+                # Slot may have been reloaded meanwhile; the newer job wins
+                if self._pending.get(slot) is not entry: continue
+                del self._pending[slot]
+                setattr(self, f"native_{slot}", data)
+            self._cache_put(cache_key, data)
+        
+        with self._load_lock, self._stage("align"):
+            self._realign_all()
 
     def load_source_a(self, filepath):
-        self.raw_a = self._load_file_fast(filepath)
-        self.y_a = self.raw_a
-        self.data_a = self._analyze(self.raw_a)
-        # Re-align others if they exist
-        if self.raw_b is not None: self.data_b = self._align_and_analyze(self.raw_b, self.raw_a)
-        if self.raw_c is not None: self.data_c = self._align_and_analyze(self.raw_c, self.raw_a)
-        if self.raw_d is not None: self.data_d = self._align_and_analyze(self.raw_d, self.raw_a)
+        self.load_source_async(0, filepath)
+        self.wait_analysis()
 
     def load_source_b(self, filepath):
-        self.raw_b = self._load_file_fast(filepath)
-        self.y_b = self.raw_b
-        if self.raw_a is not None: self.data_b = self._align_and_analyze(self.raw_b, self.raw_a)
+        self.load_source_async(1, filepath)
+        self.wait_analysis()
 
     def load_source_c(self, filepath):
-        self.raw_c = self._load_file_fast(filepath)
-        self.y_c = self.raw_c
-        if self.raw_a is not None: self.data_c = self._align_and_analyze(self.raw_c, self.raw_a)
+        self.load_source_async(2, filepath)
+        self.wait_analysis()
         
     def load_source_d(self, filepath):
-        self.raw_d = self._load_file_fast(filepath)
-        self.y_d = self.raw_d
-        if self.raw_a is not None: self.data_d = self._align_and_analyze(self.raw_d, self.raw_a)
+        self.load_source_async(3, filepath)
+        self.wait_analysis()
+
+    def load_sources(self, filepaths):
+        """Loads up to 4 files into A-D and analyzes them concurrently."""
+        for i, fp in enumerate(filepaths[:len(SLOTS)]):
+            self.load_source_async(i, fp)
+        self.wait_analysis()
 
     def load_source(self, index, filepath):
         if index == 0: self.load_source_a(filepath)
@@ -111,88 +538,111 @@ class AudioEngine:
         return [self.raw_a, self.raw_b, self.raw_c, self.raw_d]
 
     def generate_trajectory(self, shape, speed_hz, num_frames):
-        # Generate 0.0-1.0 trajectory
-        t = np.linspace(0, num_frames * (self.frame_period / 1000.0), num_frames)
-        
-        if shape == "Static":
-            return np.full(num_frames, 0.5), np.full(num_frames, 0.5)
-            
-        elif shape == "RandomPoint":
-            # Just one random point for the whole duration
-            rx = np.random.rand()
-            ry = np.random.rand()
-            return np.full(num_frames, rx), np.full(num_frames, ry)
-            
-        elif shape == "Circle":
-            omega = 2 * np.pi * speed_hz
-            x = 0.5 + 0.4 * np.cos(omega * t)
-            y = 0.5 + 0.4 * np.sin(omega * t)
-        elif shape == "Eight":
-            omega = 2 * np.pi * speed_hz
-            x = 0.5 + 0.4 * np.sin(omega * t)
-            y = 0.5 + 0.4 * np.sin(2 * omega * t)
-        elif shape == "Scan":
-            period = 1.0 / max(0.1, speed_hz)
-            phase = (t % period) / period
-            x = phase
-            y = phase
-        elif shape == "RandomMovement":
-            # True random trajectory each time
-            # Combine multiple sines with random phases
-            p1 = np.random.rand() * 2 * np.pi
-            p2 = np.random.rand() * 2 * np.pi
-            p3 = np.random.rand() * 2 * np.pi
-            p4 = np.random.rand() * 2 * np.pi
-            
-            x = 0.5 + 0.2*np.sin(2*np.pi*speed_hz*t + p1) + 0.15*np.sin(2*np.pi*speed_hz*1.3*t + p2)
-            y = 0.5 + 0.2*np.cos(2*np.pi*speed_hz*0.9*t + p3) + 0.15*np.cos(2*np.pi*speed_hz*1.7*t + p4)
-        else:
-            x, y = np.full(num_frames, 0.5), np.full(num_frames, 0.5)
-            
-        return np.clip(x, 0, 1), np.clip(y, 0, 1)
+        # 0.0-1.0 trajectory (see trajectories.py); read-only, cached unless the shape is random
+        return trajectory(shape, speed_hz, num_frames, self.frame_period)
 
-    def morph(self, x_in, y_in, shape="Static", speed=1.0, formant_shift=1.0, breath=0.0):
-        if self.data_a is None: return None
-        
-        num_frames = len(self.data_a['f0'])
-        
+    def _morph_weights(self, x_in, y_in, shape, speed, num_frames):
+        """(mx, my, bilinear weights (4, frames)); trajectory shapes come from the shared table cache."""
         if shape == "Static":
             mx = np.full(num_frames, x_in)
             my = np.full(num_frames, y_in)
-        else:
-            mx, my = self.generate_trajectory(shape, speed, num_frames)
-            
-        wa = (1.0 - mx) * (1.0 - my)
-        wb = mx * (1.0 - my)
-        wc = (1.0 - mx) * my
-        wd = mx * my
+            return mx, my, bilinear_weights(mx, my)
+        return weight_table(shape, speed, num_frames, self.frame_period)
+
+    @property
+    def analyzed_sources(self):
+        return [self.data_a, self.data_b, self.data_c, self.data_d]
+
+    def _coded_params(self, src_data):
+        """Compact (coded) envelope/aperiodicity of a source, computed once per source."""
+        if 'csp' not in src_data:
+            # Writable float64 copies if needed (cache hits are read-only memmaps)
+            sp = np.require(src_data['sp'], dtype=np.float64, requirements=['C', 'W'])
+            ap = np.require(src_data['ap'], dtype=np.float64, requirements=['C', 'W'])
+            src_data['csp'] = pw.code_spectral_envelope(sp, self.sr, self.coded_sp_dims).astype(self.dtype, copy=False)
+            src_data['cap'] = pw.code_aperiodicity(ap, self.sr).astype(self.dtype, copy=False)
+        return src_data['csp'], src_data['cap']
+
+    def _source_terms(self, src_data):
+        """
+        Per-source morph terms, computed once per aligned source (see _realign):
+        log-f0 (unvoiced -> log(1e-6)), voicing mask, C-contiguous sp/ap.
+        """
+        if 'log_f0' not in src_data:
+            f0 = src_data['f0']
+            voiced = f0 >= 1.0
+            src_data['voiced'] = voiced
+            src_data['log_f0'] = np.log(np.where(voiced, f0, 1e-6))
+            for k in ('sp', 'ap'):
+                if not src_data[k].flags.c_contiguous: src_data[k] = np.ascontiguousarray(src_data[k])
+        return src_data
+
+    def _mix_buffers(self):
+        # One set per thread (GUI morph and batch can run on the same engine)
+        bufs = getattr(self._mix_local, 'buffers', None)
+        if bufs is None:
+            bufs = self._mix_local.buffers = FxBuffers(dtype=self.dtype)
+        return bufs
+
+    def _mix_sources(self, weights, frames=None, bin_step=1):
+        """
+        Weighted mix of f0 (log domain), sp and ap over all loaded sources.
+        frames: optional slice of the source frames matching weights (streaming windows, draft decimation).
+        bin_step: keep every n-th envelope bin (draft: fft_size / n at synthesis).
+        """
+        coded = self.morph_domain == "coded"
+        num_frames = weights.shape[1]
+        sl = frames if frames is not None else slice(None)
+        bins = self.data_a['sp'].shape[1]
+        if (bins - 1) % bin_step: bin_step = 1
         
         f0_mix_log_sum = np.zeros(num_frames)
-        weight_sum = np.zeros(num_frames)
         
-        sp_shape = self.data_a['sp'].shape
-        sp_mix = np.zeros(sp_shape)
-        ap_mix = np.zeros(sp_shape)
+        # Accumulate in place into per-thread work buffers (no weighted temporaries per source).
+        # The sp/ap returned here are those buffers: valid until the next call, callers
+        # hand them straight to _shape_params (which makes new arrays).
+        bufs = self._mix_buffers()
+        if coded:
+            csp_a, cap_a = self._coded_params(self.data_a)
+            sp_mix = bufs.buffer("sp_mix", (num_frames, csp_a.shape[1]))
+            ap_mix = bufs.buffer("ap_mix", (num_frames, cap_a.shape[1]))
+        else:
+            sp_shape = (num_frames, (bins - 1) // bin_step + 1)
+            sp_mix = bufs.buffer("sp_mix", sp_shape)
+            ap_mix = bufs.buffer("ap_mix", sp_shape)
+        tmp_sp = bufs.buffer("tmp", sp_mix.shape)
+        tmp_ap = tmp_sp if ap_mix.shape == sp_mix.shape else bufs.buffer("tmp_ap", ap_mix.shape)
         
-        def acc(src_data, w_arr):
-            if src_data is None: return
-            f0 = src_data['f0']
-            f0_safe = np.where(f0 < 1.0, 1e-6, f0)
-            f0_mix_log_sum[:] += w_arr * np.log(f0_safe)
-            weight_sum[:] += w_arr
+        first = True
+        for src_data, w_arr in zip(self.analyzed_sources, weights):
+            if src_data is None: continue
+            f0_mix_log_sum += w_arr * self._source_terms(src_data)['log_f0'][sl]
             
-            w_col = w_arr[:, np.newaxis]
-            sp_mix[:] += src_data['sp'] * w_col
-            ap_mix[:] += src_data['ap'] * w_col
-
-        acc(self.data_a, wa)
-        acc(self.data_b, wb)
-        acc(self.data_c, wc)
-        acc(self.data_d, wd)
+            if coded:
+                sp_src, ap_src = self._coded_params(src_data)
+                sp_src, ap_src = sp_src[sl], ap_src[sl]
+            else: sp_src, ap_src = src_data['sp'][sl, ::bin_step], src_data['ap'][sl, ::bin_step]
+            w_col = w_arr[:, np.newaxis].astype(self.dtype)
+            if first:
+                np.multiply(sp_src, w_col, out=sp_mix)
+                np.multiply(ap_src, w_col, out=ap_mix)
+                first = False
+            else:
+                sp_mix += np.multiply(sp_src, w_col, out=tmp_sp)
+                ap_mix += np.multiply(ap_src, w_col, out=tmp_ap)
         
         f0_mix = np.exp(f0_mix_log_sum)
         f0_mix = np.where(f0_mix < 40, 0, f0_mix)
         
+        if coded:
+            # Decode once, right before synthesis
+            fft_size = (bins - 1) * 2 // bin_step
+            sp_mix = pw.decode_spectral_envelope(np.ascontiguousarray(sp_mix, dtype=np.float64), self.sr, fft_size)
+            ap_mix = pw.decode_aperiodicity(np.ascontiguousarray(ap_mix, dtype=np.float64), self.sr, fft_size)
+        
+        return f0_mix, sp_mix, ap_mix
+
+    def _shape_params(self, f0_mix, sp_mix, ap_mix, formant_shift, breath):
         # Safety for extrapolation
         sp_mix = np.maximum(0.0, sp_mix)
         ap_mix = np.clip(ap_mix, 0.0, 1.0)
@@ -205,14 +655,29 @@ class AudioEngine:
         if breath > 0.01:
              ap_mix = np.power(ap_mix, 1.0 - (breath * 0.8))
              
-        f0_mix = np.ascontiguousarray(f0_mix)
-        sp_mix = np.ascontiguousarray(sp_mix)
-        ap_mix = np.ascontiguousarray(ap_mix)
+        # pyworld boundary: float64, C-contiguous
+        f0_mix = np.ascontiguousarray(f0_mix, dtype=np.float64)
+        sp_mix = np.ascontiguousarray(sp_mix, dtype=np.float64)
+        ap_mix = np.ascontiguousarray(ap_mix, dtype=np.float64)
+        return f0_mix, sp_mix, ap_mix
+
+    def morph(self, x_in, y_in, shape="Static", speed=1.0, formant_shift=1.0, breath=0.0):
+        self.wait_analysis()
+        if self.data_a is None: return None
         
-        y = pw.synthesize(f0_mix, sp_mix, ap_mix, self.sr, frame_period=self.frame_period)
+        num_frames = len(self.data_a['f0'])
+        with self._stage("morph"):
+            mx, my, weights = self._morph_weights(x_in, y_in, shape, speed, num_frames)
+            f0_mix, sp_mix, ap_mix = self._mix_sources(weights)
+            f0_mix, sp_mix, ap_mix = self._shape_params(f0_mix, sp_mix, ap_mix, formant_shift, breath)
+        
+        with self._stage("synthesize"):
+            y = pw.synthesize(f0_mix, sp_mix, ap_mix, self.sr, frame_period=self.frame_period).astype(self.dtype, copy=False)
         
         self.generated_audio = y
         self.processed_audio = None
+        self._morph_params = (f0_mix, sp_mix, ap_mix)
+        self._pitch_cache = None
         
         if shape != "Static":
             self.last_trajectory_x = mx
@@ -223,24 +688,169 @@ class AudioEngine:
             
         return y
 
+    def morph_draft(self, x_in, y_in, shape="Static", speed=1.0, formant_shift=1.0, breath=0.0,
+                    decimate=4, bin_step=4):
+        """
+        Quick preview of morph() for XY dragging: every decimate-th frame
+        (frame_period x decimate) and every bin_step-th envelope bin (smaller
+        synthesis FFT). Same length/trajectory as morph(), roughly 4-10x cheaper.
+        Pitch curve edits on a draft fall back to the OLA path; follow up with morph().
+        """
+        self.wait_analysis()
+        if self.data_a is None: return None
+        
+        num_frames = len(self.data_a['f0'])
+        decimate = max(1, int(decimate))
+        with self._stage("morph"):
+            mx, my, weights = self._morph_weights(x_in, y_in, shape, speed, num_frames)
+            frames = slice(None, None, decimate)
+            weights = weights[:, frames]
+            f0_mix, sp_mix, ap_mix = self._mix_sources(weights, frames=frames, bin_step=bin_step)
+            f0_mix, sp_mix, ap_mix = self._shape_params(f0_mix, sp_mix, ap_mix, formant_shift, breath)
+        
+        with self._stage("synthesize"):
+            y = pw.synthesize(f0_mix, sp_mix, ap_mix, self.sr, frame_period=self.frame_period * decimate)
+        y = y[:int(num_frames * self.frame_period * self.sr / 1000.0)].astype(self.dtype, copy=False)
+        
+        self.generated_audio = y
+        self.processed_audio = None
+        self._morph_params = None
+        self._pitch_cache = None
+        self.last_trajectory_x = mx if shape != "Static" else None
+        self.last_trajectory_y = my if shape != "Static" else None
+        return y
+
+    def morph_stream(self, x_in, y_in, shape="Static", speed=1.0, formant_shift=1.0, breath=0.0,
+                     window_frames=2000, overlap_frames=16, pitch_curve=None):
+        """
+        Generator version of morph() for long sources.
+        Mixes and synthesizes overlapping frame windows (linear crossfade over
+        overlap_frames) and yields mono audio chunks, so memory stays bounded
+        by the window size. Total length matches morph().
+        pitch_curve (semitones, optional) is applied to f0 like resynthesize_pitch().
+        """
+        self.wait_analysis()
+        if self.data_a is None: return
+        
+        num_frames = len(self.data_a['f0'])
+        mx, my, weights = self._morph_weights(x_in, y_in, shape, speed, num_frames)
+        self.last_trajectory_x = mx if shape != "Static" else None
+        self.last_trajectory_y = my if shape != "Static" else None
+        ratio = None
+        if pitch_curve is not None and np.max(np.abs(pitch_curve)) >= 0.01:
+            ratio = self._pitch_ratio(pitch_curve, num_frames)
+        
+        hop = int(round(self.sr * self.frame_period / 1000.0))
+        window_frames = max(window_frames, overlap_frames + 2)
+        tail = None
+        
+        for a in range(0, num_frames, window_frames):
+            e = min(num_frames, a + window_frames)
+            # Synthesize with context frames on both sides so the crossfade
+            # region is away from WORLD's start/end transients
+            s0 = max(0, a - overlap_frames)
+            b = min(num_frames, e + 2 * overlap_frames + 1)
+            
+            with self._stage("morph"):
+                f0_mix, sp_mix, ap_mix = self._mix_sources(weights[:, s0:b], frames=slice(s0, b))
+                f0_mix, sp_mix, ap_mix = self._shape_params(f0_mix, sp_mix, ap_mix, formant_shift, breath)
+                if ratio is not None: f0_mix = f0_mix * ratio[s0:b]
+            with self._stage("synthesize"):
+                y = pw.synthesize(f0_mix, sp_mix, ap_mix, self.sr, frame_period=self.frame_period).astype(self.dtype, copy=False)
+            y = y[(a - s0) * hop:]
+            
+            if tail is not None:
+                n = min(len(tail), len(y))
+                fade = np.linspace(0.0, 1.0, n, endpoint=False)
+                y[:n] = y[:n] * fade + tail[:n] * (1.0 - fade)
+            
+            if e < num_frames:
+                keep = (e - a) * hop
+                tail = y[keep:keep + overlap_frames * hop].copy()
+                y = y[:keep]
+            else:
+                tail = None
+            yield y
+            if e >= num_frames: break
+
+    def morph_many(self, settings_list, chunk_size=8):
+        """
+        Renders N variations of the loaded source set in one vectorized pass.
+        settings_list: list of dicts using morph() keywords
+                       (x, y, shape, speed, formant_shift, breath), plus an optional
+                       "seed": np.random is seeded with it right before that setting's
+                       trajectory, so random shapes match morph() after np.random.seed(seed)
+                       whatever else shares the call.
+        Returns a list of audio arrays in the same order.
+        generated_audio / trajectories are left untouched.
+        """
+        self.wait_analysis()
+        if self.data_a is None or not settings_list: return []
+        
+        num_frames = len(self.data_a['f0'])
+        coded = self.morph_domain == "coded"
+        
+        # Stack loaded sources: (S, F) log-f0, (S, F, bins) sp/ap
+        present = [i for i, d in enumerate(self.analyzed_sources) if d is not None]
+        sources = [self.analyzed_sources[i] for i in present]
+        log_f0 = np.stack([self._source_terms(d)['log_f0'] for d in sources])
+        if coded:
+            coded_params = [self._coded_params(d) for d in sources]
+            sp_stack = np.stack([c[0] for c in coded_params])
+            ap_stack = np.stack([c[1] for c in coded_params])
+            fft_size = (self.data_a['sp'].shape[1] - 1) * 2
+        else:
+            sp_stack = np.stack([d['sp'] for d in sources])
+            ap_stack = np.stack([d['ap'] for d in sources])
+        
+        # Weight tensor (N, S, F)
+        def setting_weights(st):
+            if st.get('seed') is not None: np.random.seed(st['seed'])
+            return self._morph_weights(st.get('x', 0.5), st.get('y', 0.5), st.get('shape', "Static"),
+                                       st.get('speed', 1.0), num_frames)[2]
+        weights = np.stack([setting_weights(st) for st in settings_list])[:, present, :]
+        weights_p = weights.astype(self.dtype) # sp/ap accumulate in the engine precision
+        
+        f0_all = np.exp(np.einsum('nsf,sf->nf', weights, log_f0))
+        f0_all = np.where(f0_all < 40, 0, f0_all)
+        
+        results = [None] * len(settings_list)
+        for c0 in range(0, len(settings_list), chunk_size):
+            w = weights_p[c0:c0 + chunk_size]
+            with self._stage("morph"):
+                # einsum over sources for the whole chunk at once
+                sp_chunk = np.einsum('nsf,sfb->nfb', w, sp_stack)
+                ap_chunk = np.einsum('nsf,sfb->nfb', w, ap_stack)
+                
+                params = []
+                for j in range(len(w)):
+                    st = settings_list[c0 + j]
+                    sp_mix, ap_mix = sp_chunk[j], ap_chunk[j]
+                    if coded:
+                        sp_mix = pw.decode_spectral_envelope(np.ascontiguousarray(sp_mix, dtype=np.float64), self.sr, fft_size)
+                        ap_mix = pw.decode_aperiodicity(np.ascontiguousarray(ap_mix, dtype=np.float64), self.sr, fft_size)
+                    params.append(self._shape_params(f0_all[c0 + j], sp_mix, ap_mix,
+                                                     st.get('formant_shift', 1.0), st.get('breath', 0.0)))
+                del sp_chunk, ap_chunk
+            
+            with self._stage("synthesize"):
+                jobs = [self._submit_synthesis(*p) for p in params]
+                for j, fut in enumerate(jobs):
+                    results[c0 + j] = fut.result()
+        return results
+
+    def _submit_synthesis(self, f0, sp, ap):
+        if self.parallel:
+            try: return get_worker_pool().submit(synthesize_job, f0, sp, ap, self.sr, self.frame_period, self.precision)
+            except Exception as e: print(f"Synthesis pool unavailable, running inline: {e}")
+        fut = Future()
+        fut.set_result(synthesize_job(f0, sp, ap, self.sr, self.frame_period, self.precision))
+        return fut
+
     def _apply_formant_shift(self, sp, shift):
-        rows, cols = sp.shape
-        actual_ratio = 1.0 / shift
-        indices = np.arange(cols) * actual_ratio
-        
-        idx_l = np.floor(indices).astype(int)
-        idx_h = np.ceil(indices).astype(int)
-        alpha = indices - idx_l
-        idx_l = np.clip(idx_l, 0, cols-1)
-        idx_h = np.clip(idx_h, 0, cols-1)
-        
-        val_l = sp[:, idx_l]
-        val_h = sp[:, idx_h]
-        new_sp = val_l * (1 - alpha) + val_h * alpha
-        # Fix shape mismatch if interpolation caused it (rare but possible with weird rounding)
-        if new_sp.shape[1] != cols:
-             new_sp = new_sp[:, :cols]
-        return np.ascontiguousarray(new_sp)
+        # Bin j reads j / shift (linear interp); the sparse table is cached per (shift, bins)
+        table = formant_matrix(shift, sp.shape[1], clip_positions=False)
+        return np.ascontiguousarray((table @ sp.T).T)
 
     # ==================== NEW EFFECTS ====================
 
@@ -273,6 +883,46 @@ class AudioEngine:
     def apply_delay(self, y, time_s, feedback, mix):
         if mix < 0.01 or time_s < 0.01: return y
         
+        loops, delay_samps, tail_len = self._delay_taps(time_s, feedback)
+        
+        output_len = len(y) + tail_len
+        y_padded = np.zeros(output_len, dtype=np.result_type(y.dtype, np.float32))
+        y_padded[:len(y)] = y
+        
+        # We want: Out = Dry*(1-mix) + Wet*mix
+        # Wet = feedback comb: wet[n] = fb * (dry[n-D] + wet[n-D])
+        wet, _ = self._feedback_comb(y_padded, feedback, delay_samps, np.zeros(delay_samps))
+        
+        y_out = y_padded * (1.0 - mix) + wet * mix
+        
+        # Trim silence at very end if needed? No, let user hear tail.
+        return y_out
+
+    def _feedback_comb(self, x, feedback, delay_samps, state):
+        """
+        Recursive feedback delay processed one delay-length block at a time:
+        every block only depends on the previous one, so each step is a single
+        vectorized multiply-add and the whole thing is O(N).
+        state: last delay_samps samples of (input + wet) before x.
+        Returns (wet, new state).
+        """
+        n = len(x)
+        D = delay_samps
+        nb = -(-n // D)
+        blocks = np.zeros(nb * D, dtype=np.result_type(x.dtype, np.float32))
+        blocks[:n] = x
+        blocks = blocks.reshape(nb, D)
+        wet = np.empty_like(blocks)
+        prev = state
+        for k in range(nb):
+            np.multiply(prev, feedback, out=wet[k])
+            prev = blocks[k] + wet[k]
+        wet = wet.reshape(-1)[:n]
+        # Padding of the last partial block must not leak into the state
+        state = np.concatenate((state, x + wet))[-D:]
+        return wet, state
+
+    def _delay_taps(self, time_s, feedback):
         # Calculate sufficient tail
         # feedback^N < 0.001
         # N * log(fb) < log(0.001) -> N > -3 / log(fb)
@@ -285,42 +935,7 @@ class AudioEngine:
         loops = min(loops, 20) # cap
         tail_len = int(time_s * self.sr * loops)
         delay_samps = int(time_s * self.sr)
-        
-        output_len = len(y) + tail_len
-        y_padded = np.zeros(output_len)
-        y_padded[:len(y)] = y
-        
-        wet_accum = np.zeros(output_len)
-        
-        # Add echoes
-        cursor = 0
-        current_amp = 1.0
-        
-        # We want: Out = Dry*(1-mix) + Wet*mix
-        # Wet = Sum(Echoes)
-        
-        # Optimize: Sparse addition
-        for i in range(1, loops + 1):
-             start = i * delay_samps
-             if start >= output_len: break
-             vol = feedback ** i
-             
-             # Add shifted copy
-             # We take "y" (original dry) and shift it
-             # Limitation: This is simple echo (feed forward taps), not infinite feedback filtering 
-             # But good enough for this app structure. 
-             # True feedback requires IIR which is harder to implement without loop or compiled code for growing arrays.
-             
-             copy_len = len(y)
-             if start + copy_len > output_len:
-                 copy_len = output_len - start
-                 
-             wet_accum[start:start+copy_len] += y[:copy_len] * vol
-
-        y_out = y_padded * (1.0 - mix) + wet_accum * mix
-        
-        # Trim silence at very end if needed? No, let user hear tail.
-        return y_out
+        return loops, delay_samps, tail_len
 
     def apply_reverb(self, y, mix):
         """
@@ -328,27 +943,9 @@ class AudioEngine:
         """
         if mix < 0.01: return y
         
-        # Create impulse response: decaying noise
-        rt60 = 2.0 # seconds
-        len_impulse = int(rt60 * self.sr)
-        
-        # Reuse impulse cache/seed?
-        # For determinism in batch?
-        np.random.seed(42) 
-        
-        t = np.linspace(0, 1, len_impulse)
-        noise = np.random.randn(len_impulse)
-        envelope = np.exp(-7 * t) # Decay
-        impulse = noise * envelope
-        
-        # Normalize impulse power?
-        # Impulse sum roughly 1
-        impulse /= np.sum(np.abs(impulse))
-        impulse *= 1.5 # Gain compensation
-        
-        # Convolve
-        # mode='full' adds tail size of impulse-1
-        wet = scipy.signal.fftconvolve(y, impulse, mode='full')
+        # Convolve (IR + its spectra come from the shared bank)
+        # full length adds tail size of impulse-1
+        wet = self._convolve_reverb(y)
         
         # Pad dry to match wet length
         if len(wet) > len(y):
@@ -357,6 +954,13 @@ class AudioEngine:
             y_padded = y
             
         return y_padded * (1-mix) + wet * mix
+
+    def _reverb_impulse(self):
+        # Decaying noise, rt60 = 2s, fixed seed for determinism in batch
+        return get_impulse_bank().impulse(self.reverb_rt60, self.sr, self.reverb_seed)
+
+    def _convolve_reverb(self, y):
+        return get_impulse_bank().convolve(y, self.reverb_rt60, self.sr, self.reverb_seed)
         
     def apply_spacer(self, y, width):
         # Input y can be (N,) or (N,2).
@@ -411,59 +1015,176 @@ class AudioEngine:
                          
         if self.generated_audio is None: return None
         
-        # Ensure base
-        y = self.generated_audio.copy()
-        
-        # 1. Morph Pitch (OLA)
-        y = self.apply_pitch_contour(y, pitch_curve_y)
+        # Stages: pitch -> speed -> tone/growl -> ringmod -> bitcrush -> dist
+        #         -> delay -> reverb -> vol -> spacer (stereo) -> peak protection
+        chain = EffectChain(self, pitch_curve_y, speed=speed, growl=growl, tone=tone, dist=dist,
+                            bit_depth=bit_depth, bit_rate_div=bit_rate_div,
+                            ring_freq=ring_freq, ring_mix=ring_mix,
+                            delay_time=delay_time, delay_fb=delay_fb, delay_mix=delay_mix,
+                            reverb_mix=reverb_mix, spacer_width=spacer_width, vol=vol,
+                            buffers=self.fx_buffers, profiler=self.profiler)
+        y_final = chain.run()
+        self.last_fx_timings = chain.timings
         
-        # 2. Speed (Time Stretch)
-        if abs(speed - 1.0) > 0.01:
-            try: y = librosa.effects.time_stretch(y, rate=speed)
-            except: pass
+        self.processed_audio = y_final
+        return self.processed_audio
 
-        # --- MOD & TONE ---
+    def process_stream(self, chunks,
+                       growl=0.0, tone=0.0,
+                       dist=0.0,
+                       bit_depth=16, bit_rate_div=1,
+                       ring_freq=30, ring_mix=0.0,
+                       delay_time=0.2, delay_fb=0.0, delay_mix=0.0,
+                       reverb_mix=0.0,
+                       spacer_width=1.0,
+                       vol=1.0):
+        """
+        Chunk-wise version of process_pipeline() for morph_stream() output.
+        Each stage keeps its own state (filter memory, echo history, reverb tail)
+        so the result matches the offline chain, and tails are flushed at the end.
+        Differences: the pitch curve goes to morph_stream(pitch_curve=...), Speed
+        needs the whole signal and is not available here, and the final peak
+        normalization becomes a hard clip.
+        Yields (N, 2) stereo chunks.
+        """
+        stages = []
+        
         # 3. Tone & Growl
         if growl > 0.01 or abs(tone) > 0.01:
-            y = self.apply_tone_growl(y, growl, tone)
-
+            pos = [0]
+            zi = [None]
+            if abs(tone) > 0.01:
+                nyquist = 0.5 * self.sr
+                if tone > 0: b, a = scipy.signal.butter(1, max(10, 500 * tone)/nyquist, btype='high')
+                else: b, a = scipy.signal.butter(1, (20000 * (1.0 + tone * 0.9) + 100)/nyquist, btype='low')
+                zi[0] = np.zeros(max(len(a), len(b)) - 1)
+            def tone_growl(x):
+                if growl > 0.01:
+                    t = (pos[0] + np.arange(len(x))) / self.sr
+                    x = x * (1.0 + (growl * 0.9) * np.sin(2 * np.pi * 60.0 * t))
+                pos[0] += len(x)
+                if zi[0] is not None:
+                    x, zi[0] = scipy.signal.lfilter(b, a, x, zi=zi[0])
+                return x
+            stages.append((tone_growl, None))
+        
         # 4. Ring Mod
         if ring_mix > 0.01:
-            y = self.apply_ringmod(y, ring_freq, ring_mix)
-
-        # --- LO-FI ---
+            ring_pos = [0]
+            def ringmod(x):
+                t = (ring_pos[0] + np.arange(len(x))) / self.sr
+                ring_pos[0] += len(x)
+                return x * (1 - ring_mix) + x * np.sin(2 * np.pi * ring_freq * t) * ring_mix
+            stages.append((ringmod, None))
+        
         # 5. Bitcrush
         if bit_rate_div > 1 or bit_depth < 16:
-            y = self.apply_bitcrush(y, bit_depth, bit_rate_div)
-            
+            div = int(bit_rate_div)
+            crush_state = {'pos': 0, 'held': 0.0}
+            def bitcrush(x):
+                if div > 1 and len(x) > 0:
+                    idx = np.arange(len(x))
+                    src = idx - ((crush_state['pos'] + idx) % div)
+                    held = np.where(src >= 0, x[np.maximum(src, 0)], crush_state['held'])
+                    crush_state['held'] = held[-1]
+                    x = held
+                crush_state['pos'] += len(x)
+                if bit_depth < 16:
+                    steps = 2 ** bit_depth
+                    x = np.round(x * steps) / steps
+                return x
+            stages.append((bitcrush, None))
+        
         # 6. Distortion (Tanh)
         if dist > 0.01:
             gain = 1 + dist * 10
-            y = np.tanh(y * gain)
+            stages.append((lambda x: np.tanh(x * gain), None))
         
-        # --- TIME & SPACE ---
-        # 7. Delay
-        if delay_mix > 0.01:
-            y = self.apply_delay(y, delay_time, delay_fb, delay_mix)
-            
-        # 8. Reverb
+        # 7. Delay (feedback comb, state carried across chunks)
+        if delay_mix > 0.01 and delay_time >= 0.01:
+            loops, delay_samps, tail_len = self._delay_taps(delay_time, delay_fb)
+            comb_state = [np.zeros(delay_samps)]
+            def delay(x):
+                wet, comb_state[0] = self._feedback_comb(x, delay_fb, delay_samps, comb_state[0])
+                return x * (1.0 - delay_mix) + wet * delay_mix
+            stages.append((delay, lambda: delay(np.zeros(tail_len))))
+        
+        # 8. Reverb (overlap-add of the impulse tail)
         if reverb_mix > 0.01:
-            y = self.apply_reverb(y, reverb_mix)
-            
+            impulse = self._reverb_impulse()
+            carry = [np.zeros(len(impulse) - 1)]
+            def reverb(x):
+                wet = self._convolve_reverb(x)
+                wet[:len(carry[0])] += carry[0]
+                carry[0] = wet[len(x):].copy()
+                return x * (1 - reverb_mix) + wet[:len(x)] * reverb_mix
+            stages.append((reverb, lambda: carry[0] * reverb_mix))
+        
         # 9. Volume
-        y = y * vol
+        stages.append((lambda x: x * vol, None))
         
-        # 10. Spacer (Last step, makes it stereo)
-        # Even if width=0 (mono), it returns (N,2) array which is fine for SF.write
-        y_final = self.apply_spacer(y, spacer_width)
+        def run(x, start):
+            for fn, _ in stages[start:]:
+                x = fn(x)
+            return x
         
-        # Normalize hard clip protection
-        max_val = np.max(np.abs(y_final))
-        if max_val > 1.0:
-            y_final /= max_val
-            
-        self.processed_audio = y_final
-        return self.processed_audio
+        # 10. Spacer (needs the last 15ms of the previous chunk for the R channel)
+        spacer_hist = [np.zeros(int(0.015 * self.sr))]
+        def spacer(x):
+            ext = np.concatenate((spacer_hist[0], x))
+            d = len(spacer_hist[0])
+            r = ext[:len(x)]
+            spacer_hist[0] = ext[len(ext) - d:]
+            l = x
+            if spacer_width == 1.0: out = np.column_stack((l, r))
+            elif spacer_width < 0.01:
+                m = (l + r) / 2.0
+                out = np.column_stack((m, m))
+            else:
+                mid = (l + r) / 2.0
+                side = (l - r) / 2.0 * spacer_width
+                out = np.column_stack((mid + side, mid - side))
+            # Hard clip (peak normalization needs the whole signal)
+            return np.clip(out, -1.0, 1.0).astype(self.dtype, copy=False)
+        
+        for chunk in chunks:
+            yield spacer(run(np.asarray(chunk, dtype=self.dtype), 0))
+        
+        # Flush tails (delay -> reverb -> ...) in chain order
+        for i, (_, flush) in enumerate(stages):
+            if flush is None: continue
+            tail = flush()
+            if len(tail): yield spacer(run(tail, i + 1))
+
+    def _pitch_ratio(self, pitch_curve_y, num_frames):
+        # Semitone curve (GUI points spread over the whole sound) -> per-frame f0 multiplier
+        x_points = np.linspace(0, num_frames - 1, len(pitch_curve_y))
+        x_all = np.arange(num_frames)
+        try:
+            semitones = PchipInterpolator(x_points, pitch_curve_y)(x_all)
+        except:
+            semitones = np.interp(x_all, x_points, pitch_curve_y)
+        return np.power(2.0, semitones / 12.0)
+
+    def resynthesize_pitch(self, pitch_curve_y):
+        """
+        Applies the pitch curve as an f0 multiplier on the cached params of the
+        last morph() and re-runs only pw.synthesize (formants are preserved).
+        Returns a fresh copy of the audio, or None if no morph params are cached.
+        """
+        if self._morph_params is None: return None
+        if np.max(np.abs(pitch_curve_y)) < 0.01: return self.generated_audio.copy()
+        
+        curve = np.ascontiguousarray(pitch_curve_y, dtype=np.float64)
+        key = curve.tobytes()
+        if self._pitch_cache is not None and self._pitch_cache[0] == key:
+            return self._pitch_cache[1].copy()
+        
+        f0, sp, ap = self._morph_params
+        f0 = np.ascontiguousarray(f0 * self._pitch_ratio(curve, len(f0)))
+        y = pw.synthesize(f0, sp, ap, self.sr, frame_period=self.frame_period).astype(self.dtype, copy=False)
+        self._pitch_cache = (key, y)
+        return y.copy()
 
     def apply_pitch_contour(self, y, pitch_curve_y):
         if np.max(np.abs(pitch_curve_y)) < 0.01: return y
@@ -517,48 +1238,84 @@ class AudioEngine:
                 y = scipy.signal.lfilter(b, a, y)
         return y
 
-    def save_output(self, filepath, trim=False):
+    def save_output(self, filepath, trim=False, writer=None, callback=None):
+        """
+        Writes the processed (or raw morph) audio as PCM_24.
+        writer: optional AsyncWriter -> the write is queued and this returns at once;
+                callback(filepath, ok, msg) then runs on the writer thread.
+        """
         target = self.processed_audio if self.processed_audio is not None else self.generated_audio
         if target is None: return
         
         if trim:
-             # librosa trim works on (channels, samples) or (samples, )
-             # Our target (stereo) is (samples, 2). Librosa expects mono or (channels, samples).
-             # We should transpose for librosa, then transpose back? 
-             # Or just trim based on Mono mix?
-             
-             # Safest: Transpose to (2, N) for librosa 0.10+ which supports multi-channel?
-             # Actually librosa.effects.trim computes from mono ref. 
-             # Let's just pass (2, N) if possible or manually.
-             
-             target_T = target.T # (2, N)
-             # trim returns (trimmed_data, index_tuple)
-             # But librosa.effects.trim expects audio as first arg. 
-             # It calculates envelope on mono ref.
-             try:
-                 # ref=np.max ensures it looks at max of channels
-                 trimmed_y, _ = librosa.effects.trim(target_T, top_db=40, ref=np.max) 
-                 target = trimmed_y.T # (N_new, 2)
-             except: pass
-             
-        sf.write(filepath, target, self.sr, subtype='PCM_24')
+            # Peak/RMS block trim (top_db=40, loudest channel), no librosa feature pass
+            with self._stage("trim"):
+                target = trim_silence(target, top_db=40)
         
+        if writer is not None:
+            # The write itself is timed by the writer (AsyncWriter(profiler=...))
+            writer.submit(filepath, target, self.sr, subtype='PCM_24', callback=callback)
+            return
+        with self._stage("write"):
+            sf.write(filepath, target, self.sr, subtype='PCM_24')
+        if callback is not None: callback(filepath, True, "Success")
+        
+    def save_stream(self, filepath, chunks):
+        """Writes audio chunks (mono or stereo) incrementally as PCM_24."""
+        f = None
+        frames = 0
+        try:
+            for chunk in chunks:
+                if f is None:
+                    channels = 1 if chunk.ndim == 1 else chunk.shape[1]
+                    f = sf.SoundFile(filepath, 'w', samplerate=self.sr, channels=channels, subtype='PCM_24')
+                f.write(chunk)
+                frames += len(chunk)
+        finally:
+            if f is not None: f.close()
+        return frames
+
     def render_batch_sample(self, filepath, morph_x, morph_y, shape, m_speed, formant, breath, pitch_curve, 
                             speed, growl, tone, dist, 
                             bit_depth, bit_rate_div, ring_freq, ring_mix,
                             delay_time, delay_fb, delay_mix, reverb_mix, spacer_width, vol,
-                            trim_silence=False):
-        try:
-            self.morph(morph_x, morph_y, shape=shape, speed=m_speed, formant_shift=formant, breath=breath)
-            self.process_pipeline(pitch_curve, speed=speed, growl=growl, tone=tone, dist=dist,
-                                  bit_depth=bit_depth, bit_rate_div=bit_rate_div,
-                                  ring_freq=ring_freq, ring_mix=ring_mix,
-                                  delay_time=delay_time, delay_fb=delay_fb, delay_mix=delay_mix,
-                                  reverb_mix=reverb_mix, spacer_width=spacer_width, vol=vol)
-            self.save_output(filepath, trim=trim_silence)
-            return True, "Success"
-        except Exception as e:
-            return False, str(e)
+                            trim_silence=False, morphed=None, stream=False, writer=None, callback=None):
+        # morphed: audio already rendered by morph_many() -> skip the morph step
+        # stream: window-by-window render/write with bounded memory (long sources)
+        # writer/callback: queue the file on an AsyncWriter (see save_output)
+        with self._stage("render"):
+            try:
+                if stream:
+                    if abs(speed - 1.0) > 0.01:
+                        print("Stream render: Speed is not applied in streaming mode.")
+                    chunks = self.morph_stream(morph_x, morph_y, shape=shape, speed=m_speed, formant_shift=formant, breath=breath,
+                                               pitch_curve=pitch_curve)
+                    chunks = self.process_stream(chunks, growl=growl, tone=tone, dist=dist,
+                                                 bit_depth=bit_depth, bit_rate_div=bit_rate_div,
+                                                 ring_freq=ring_freq, ring_mix=ring_mix,
+                                                 delay_time=delay_time, delay_fb=delay_fb, delay_mix=delay_mix,
+                                                 reverb_mix=reverb_mix, spacer_width=spacer_width, vol=vol)
+                    # Morph/synthesis windows are recorded inside; FX + write interleave with them
+                    with self._stage("stream"):
+                        self.save_stream(filepath, chunks)
+                    if callback is not None: callback(filepath, True, "Success")
+                    return True, "Success"
+                if morphed is None:
+                    self.morph(morph_x, morph_y, shape=shape, speed=m_speed, formant_shift=formant, breath=breath)
+                else:
+                    self.generated_audio = morphed
+                    self.processed_audio = None
+                    self._morph_params = None
+                    self._pitch_cache = None
+                self.process_pipeline(pitch_curve, speed=speed, growl=growl, tone=tone, dist=dist,
+                                      bit_depth=bit_depth, bit_rate_div=bit_rate_div,
+                                      ring_freq=ring_freq, ring_mix=ring_mix,
+                                      delay_time=delay_time, delay_fb=delay_fb, delay_mix=delay_mix,
+                                      reverb_mix=reverb_mix, spacer_width=spacer_width, vol=vol)
+                self.save_output(filepath, trim=trim_silence, writer=writer, callback=callback)
+                return True, "Success"
+            except Exception as e:
+                return False, str(e)
 
 # ==================== CLASSIFIER ====================
 class AudioClassifier:
@@ -0,0 +1,258 @@
+"""
+Headless batch renderer (no Tk / pygame needed).
+
+    python batch_cli.py jobs.json -o output -j 8
+
+Job file: a JSON object, a JSON list of objects, or JSONL (one object per line).
+
+    {
+      "sources": ["wav/a.wav", "wav/b.wav"],   # 1-4 files (A = master), relative to the job file
+      "count": 20,
+      "seed": 1,                                # optional, random if omitted
+      "prefix": "creature",                     # optional
+      "profile": "fast",                        # optional analysis profile
+      "trim": true,                             # optional, trim silence on save
+      "shapes": ["Circle", "Eight", "Static"],  # optional, may use trajectory names
+      "trajectories": ["paths/swoop.json"],     # optional trajectory files (name = file name), see trajectories.py
+      "ranges": {"formant": [0.8, 1.2], "reverb": 0.1, ...}
+    }
+
+"ranges" uses the same keys as the batch panel of main.py (its saved settings
+"batch" block can be pasted as is); a single number fixes the value.
+Renders are drawn up front from the seed, split into chunks per source set and
+distributed over a process pool. Each worker keeps the analyzed sources of its
+recent source sets in memory (plus the shared on-disk analysis cache).
+Every finished file is appended to <out>/manifest.jsonl.
+--stats report.json (or .csv) aggregates per-stage time / peak memory over all workers.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from audio_engine import AudioEngine, ANALYSIS_PROFILES
+from output_writer import AsyncWriter
+from profiler import StageProfiler
+import trajectories
+
+SHAPES = ["Circle", "Eight", "Scan", "RandomMovement", "RandomPoint", "Static"]
+
+# Same defaults as main.App batch ranges
+DEFAULT_RANGES = {
+    "morph_x": (0.0, 1.0), "morph_y": (0.0, 1.0), "mspeed": (0.5, 2.0),
+    "formant": (0.8, 1.2), "breath": (0.0, 0.5), "speed": (0.9, 1.1), "vol": (0.8, 1.0),
+    "growl": (0.0, 0.5), "tone": (-0.5, 0.5), "ring_mix": (0.0, 0.3), "ring_freq": (30, 200),
+    "spacer": (0.8, 1.2), "reverb": (0.0, 0.2), "d_time": (0.1, 0.3), "d_fb": (0.0, 0.4), "d_mix": (0.0, 0.3),
+    "dist": (0.0, 0.2), "bits": (12, 16), "srdiv": (1, 4),
+}
+
+# render_batch_sample() FX argument order
+FX_KEYS = ("speed", "growl", "tone", "dist", "bits", "srdiv", "ring_freq", "ring_mix",
+           "d_time", "d_fb", "d_mix", "reverb", "spacer", "vol")
+
+
+def load_jobs(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+        jobs = data if isinstance(data, list) else [data]
+    except json.JSONDecodeError:
+        jobs = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    base = os.path.dirname(os.path.abspath(path))
+    for job in jobs:
+        srcs = job.get("sources", [])
+        if not 1 <= len(srcs) <= 4:
+            raise ValueError(f"Job needs 1-4 sources, got {len(srcs)}")
+        job["sources"] = [s if os.path.isabs(s) else os.path.join(base, s) for s in srcs]
+        job["trajectories"] = [p if os.path.isabs(p) else os.path.join(base, p) for p in job.get("trajectories", [])]
+        # Validate up front and keep the registered names (a JSON "name" wins over the
+        # file name); workers load the files again
+        job["trajectory_names"] = [trajectories.load_path(p) for p in job["trajectories"]]
+    for job in jobs:
+        # Checked after every job's trajectories are registered
+        unknown = [s for s in job.get("shapes", []) if s not in trajectories.shape_names()]
+        if unknown:
+            raise ValueError(f"Unknown shape(s) {unknown}; known: {trajectories.shape_names()}")
+    return jobs
+
+
+def draw_renders(job, job_index, out_dir):
+    """Draws every render of a job from its seed (independent of worker scheduling)."""
+    seed = job.get("seed")
+    rng = random.Random(seed)
+    ranges = dict(DEFAULT_RANGES)
+    ranges.update(job.get("ranges", {}))
+    shapes = job.get("shapes", SHAPES[:5] + job["trajectory_names"])
+    prefix = job.get("prefix", f"job{job_index + 1:02d}")
+
+    def r(key):
+        v = ranges[key]
+        if isinstance(v, (int, float)): return float(v)
+        mn, mx = float(v[0]), float(v[1])
+        return rng.uniform(mn, mx) if mn != mx else mn
+
+    renders = []
+    for i in range(int(job.get("count", 1))):
+        x = r("morph_x"); y = r("morph_y")
+        # Same shape logic as main.App.batch_worker
+        shape = rng.choice(shapes) if rng.random() > 0.5 else "Static"
+        if len(job["sources"]) == 1: shape = "Static"
+        if shape == "RandomPoint":
+            x = rng.random(); y = rng.random()
+        fx = {k: r(k) for k in FX_KEYS}
+        fx["bits"] = int(round(fx["bits"])); fx["srdiv"] = int(round(fx["srdiv"]))
+        renders.append({
+            "file": os.path.join(out_dir, f"{prefix}_{i + 1:03d}.wav"),
+            "job": job_index, "index": i + 1,
+            "morph": {"x": x, "y": y, "shape": shape, "speed": r("mspeed"),
+                      "formant_shift": r("formant"), "breath": r("breath")},
+            "fx": fx,
+            # Random trajectories inside the engine use np.random
+            "np_seed": rng.randrange(2 ** 32),
+        })
+    return renders
+
+
+# ---------- Worker side ----------
+_engines = {} # (sources, profile, precision) -> AudioEngine with analyzed sources
+_MAX_ENGINES = 2
+_loaded_paths = set() # trajectory files registered in this worker (keeps their weight tables cached)
+
+def _load_trajectories(paths):
+    for p in paths:
+        if p not in _loaded_paths:
+            trajectories.load_path(p)
+            _loaded_paths.add(p)
+
+def _get_engine(sources, profile, precision, profiler=None):
+    key = (tuple(sources), profile, precision)
+    engine = _engines.pop(key, None)
+    if engine is None:
+        # No nested pools inside a worker process
+        engine = AudioEngine(parallel=False, profile=profile, precision=precision)
+        engine.profiler = profiler # load / analyze / align of a new source set
+        engine.load_sources(sources)
+    _engines[key] = engine # most recent last
+    while len(_engines) > _MAX_ENGINES:
+        _engines.pop(next(iter(_engines)))
+    return engine
+
+
+def render_chunk(sources, profile, precision, trim, renders, stats=False, paths=()):
+    """
+    Worker entry point: one vectorized morph pass for the chunk, then FX + write per render.
+    Returns (results, profiler records or None).
+    """
+    _load_trajectories(paths)
+    profiler = StageProfiler(memory=True) if stats else None
+    engine = _get_engine(sources, profile, precision, profiler)
+    engine.profiler = profiler
+    results = []
+    try:
+        # Each render's random trajectory comes from its own seed, not from the chunk it landed in
+        morphed = engine.morph_many([dict(r["morph"], seed=r["np_seed"]) for r in renders], chunk_size=len(renders))
+    except Exception as e:
+        print(f"morph_many failed, falling back to per-sample morph: {e}")
+        morphed = []
+
+    # Writes overlap the next render; the write result completes the manifest entry
+    def written(res):
+        def callback(filepath, ok, msg):
+            res["ok"], res["msg"] = ok, msg
+        return callback
+
+    with AsyncWriter(profiler=profiler) as writer:
+        for k, r in enumerate(renders):
+            t0 = time.perf_counter()
+            m = r["morph"]
+            np.random.seed(r["np_seed"])
+            res = dict(r, sources=list(sources), profile=profile)
+            ok, msg = engine.render_batch_sample(
+                r["file"], m["x"], m["y"], m["shape"], m["speed"], m["formant_shift"], m["breath"],
+                np.zeros(100), *[r["fx"][key] for key in FX_KEYS],
+                trim_silence=trim, morphed=morphed[k] if k < len(morphed) else None,
+                writer=writer, callback=written(res))
+            if not ok: res["ok"], res["msg"] = ok, msg
+            res["seconds"] = round(time.perf_counter() - t0, 4)
+            results.append(res)
+    
+    engine.profiler = None
+    if profiler is None: return results, None
+    profiler.close()
+    return results, profiler.records
+
+
+# ---------- Parent side ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless MultiMorpher batch renderer")
+    parser.add_argument("jobs", help="JSON / JSONL job file")
+    parser.add_argument("-o", "--out", default="output", help="output folder (default: output)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=8, help="renders per morph_many pass (default: 8)")
+    parser.add_argument("--profile", choices=list(ANALYSIS_PROFILES.keys()), help="override the analysis profile of every job")
+    parser.add_argument("--precision", choices=["float64", "float32"], default="float64")
+    parser.add_argument("--stats", metavar="PATH", help="write a per-stage time/memory report (.json or .csv)")
+    parser.add_argument("--dry-run", action="store_true", help="only print the drawn renders")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.jobs)
+    os.makedirs(args.out, exist_ok=True)
+
+    tasks = []
+    for j, job in enumerate(jobs):
+        renders = draw_renders(job, j, args.out)
+        profile = args.profile or job.get("profile", "quality")
+        for c0 in range(0, len(renders), args.chunk):
+            tasks.append((job["sources"], profile, args.precision, bool(job.get("trim", False)), renders[c0:c0 + args.chunk],
+                          job["trajectories"]))
+    total = sum(len(t[4]) for t in tasks)
+
+    if args.dry_run:
+        for t in tasks:
+            for r in t[4]: print(json.dumps(r))
+        return 0
+
+    print(f"{len(jobs)} job(s), {total} render(s), {args.workers} worker(s)")
+    t_start = time.perf_counter()
+    done = failed = 0
+    profiler = StageProfiler() if args.stats else None
+    manifest_path = os.path.join(args.out, "manifest.jsonl")
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+         ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        # Chunks of the same source set are submitted back to back, so a worker
+        # usually picks up a set it has already analyzed
+        futures = {pool.submit(render_chunk, *t[:5], stats=bool(args.stats), paths=t[5]): t for t in tasks}
+        for fut in as_completed(futures):
+            try: results, records = fut.result()
+            except Exception as e:
+                # Every render of the chunk gets a failed manifest entry
+                t = futures[fut]
+                print(f"Chunk failed ({len(t[4])} renders): {e}")
+                results, records = [dict(r, sources=list(t[0]), profile=t[1], ok=False, msg=f"chunk failed: {e}")
+                                    for r in t[4]], None
+            if records is not None: profiler.merge(records)
+            for res in results:
+                manifest.write(json.dumps(res) + "\n")
+                done += 1
+                if not res["ok"]: failed += 1
+                print(f"[{done}/{total}] {'OK ' if res['ok'] else 'ERR'} {os.path.basename(res['file'])} {res['msg'] if not res['ok'] else ''}")
+            manifest.flush()
+
+    elapsed = time.perf_counter() - t_start
+    print(f"Finished {done} render(s) in {elapsed:.1f}s ({failed} failed). Manifest: {manifest_path}")
+    if profiler is not None:
+        # Stage totals are summed over workers, so wall % can exceed 100 with -j > 1
+        profiler.close()
+        print(profiler.summary())
+        profiler.save(args.stats)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+WORLD morph engine benchmark: analysis, morph per trajectory shape,
+process_pipeline per effect and save_output, as seconds + realtime factor.
+
+    python benchmarks/bench_engine.py [--seconds 5 20] [--sources 4] [--repeat 3]
+    python benchmarks/bench_engine.py --compare benchmarks/results/<old>.json
+
+Sources are synthetic (harmonic sweeps / noise bursts over a harmonic bed),
+generated from a fixed seed. Times are the best of --repeat runs, realtime
+factor = audio seconds / compute seconds (higher is faster). Results are saved
+as benchmarks/results/<commit>.json so two commits can be compared;
+with --compare the exit code is 1 if anything got slower than --threshold %.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from audio_engine import AudioEngine, ANALYSIS_PROFILES
+from analysis_cache import AnalysisCache, file_digest
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SHAPES = ["Static", "Circle", "Eight", "Scan", "RandomMovement", "RandomPoint"]
+
+# One effect on at a time (the rest at process_pipeline defaults = off)
+EFFECTS = {
+    "none":     {},
+    "pitch":    {"pitch_curve_y": np.linspace(-3, 5, 100)},
+    "speed":    {"speed": 1.2},
+    "growl":    {"growl": 0.5},
+    "tone":     {"tone": -0.4},
+    "ringmod":  {"ring_freq": 120, "ring_mix": 0.3},
+    "bitcrush": {"bit_depth": 10, "bit_rate_div": 4},
+    "dist":     {"dist": 0.3},
+    "delay":    {"delay_time": 0.2, "delay_fb": 0.5, "delay_mix": 0.3},
+    "reverb":   {"reverb_mix": 0.3},
+    "spacer":   {"spacer_width": 1.5},
+    "vol":      {"vol": 0.8},
+}
+
+
+def make_sources(out_dir, count, seconds, sr=48000, seed=0):
+    rng = np.random.RandomState(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+    paths = []
+    for i in range(count):
+        if i % 2 == 0:
+            # Harmonic sweep (exponential glide + vibrato)
+            f0 = 90 * (i + 1) * np.power(2.0, t / seconds) * (1 + 0.02 * np.sin(2 * np.pi * 5 * t))
+            phase = 2 * np.pi * np.cumsum(f0) / sr
+            y = sum(np.sin(k * phase) / k for k in range(1, 10)) * 0.2
+            y += rng.randn(n) * 0.005
+        else:
+            # Noise bursts (~4/s, random length) over a quiet harmonic bed
+            phase = 2 * np.pi * np.cumsum(np.full(n, 150.0 * i)) / sr
+            y = sum(np.sin(k * phase) / k for k in range(1, 6)) * 0.05
+            env = np.zeros(n)
+            for start in rng.randint(0, n, int(4 * seconds)):
+                length = rng.randint(sr // 50, sr // 5)
+                seg = env[start:start + length]
+                seg[:] = np.maximum(seg, np.exp(-np.arange(len(seg)) / (length / 4)))
+            y += rng.randn(n) * env * 0.3
+        path = os.path.join(out_dir, f"src_{seconds:g}s_{i}.wav")
+        sf.write(path, y.astype(np.float32), sr)
+        paths.append(path)
+    return paths
+
+
+def best_of(repeat, fn, setup=None, warmup=False):
+    # warmup: one untimed run first (FFT plans, librosa/numba first-call cost)
+    if warmup:
+        if setup is not None: setup()
+        fn()
+    times = []
+    for _ in range(repeat):
+        if setup is not None: setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def bench_length(seconds, args, tmp):
+    paths = make_sources(tmp, args.sources, seconds)
+    engine = AudioEngine(use_cache=False, parallel=False, profile=args.profile, precision=args.precision)
+    results = {}
+
+    def put(name, secs, audio_seconds):
+        results[f"{seconds:g}s/{name}"] = {"seconds": round(secs, 5), "rtf": round(audio_seconds / secs, 2) if secs > 0 else None}
+        print(f"  {name:<22}{secs:>9.4f}s {audio_seconds / secs:>9.1f}x")
+
+    # Analysis: each source timed on its own, the results are handed to the engine
+    # through a throwaway cache so load_sources() does not analyze again
+    engine.cache = AnalysisCache(os.path.join(tmp, f"cache_{seconds:g}"))
+    for i, path in enumerate(paths):
+        y = engine._load_file_fast(path)
+        data = [None]
+        def run(): data[0] = engine._analyze(y)
+        put(f"analyze[{i}]", best_of(args.repeat, run), seconds)
+        engine._cache_put(engine._cache_key(file_digest(path)), data[0])
+    engine.load_sources(paths)
+
+    # Morph per trajectory shape (random shapes are seeded per run)
+    for shape in SHAPES:
+        put(f"morph[{shape}]", best_of(args.repeat, lambda: engine.morph(0.3, 0.6, shape=shape, formant_shift=1.1, breath=0.1),
+                                       setup=lambda: np.random.seed(0), warmup=True), seconds)
+
+    # FX on the Static morph
+    engine.morph(0.3, 0.6, formant_shift=1.1, breath=0.1)
+    for name, kwargs in EFFECTS.items():
+        kwargs = dict(kwargs)
+        curve = kwargs.pop("pitch_curve_y", np.zeros(100))
+        # Drop the cached pitch render so "pitch" re-synthesizes every run
+        def reset(): engine._pitch_cache = None
+        put(f"fx[{name}]", best_of(args.repeat, lambda: engine.process_pipeline(curve, **kwargs), setup=reset, warmup=True), seconds)
+
+    # Write (stereo output of the plain chain)
+    engine.process_pipeline(np.zeros(100))
+    out = os.path.join(tmp, "out.wav")
+    put("save", best_of(args.repeat, lambda: engine.save_output(out)), seconds)
+    put("save[trim]", best_of(args.repeat, lambda: engine.save_output(out, trim=True)), seconds)
+    return results
+
+
+def git_commit():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old, new, threshold):
+    """Prints old/new seconds per benchmark; returns the names slower than threshold %."""
+    slower = []
+    print(f"\nvs {old['meta'].get('commit', '?')}")
+    for key in ("profile", "precision", "sources", "machine", "cpus"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"Warning: {key} differs ({old['meta'].get(key)} -> {new['meta'].get(key)})")
+    print(f"{'benchmark':<30}{'old s':>10}{'new s':>10}{'change':>9}")
+    for name, r in new["results"].items():
+        o = old["results"].get(name)
+        if o is None: continue
+        change = (r["seconds"] / o["seconds"] - 1.0) * 100.0 if o["seconds"] > 0 else 0.0
+        mark = ""
+        if change > threshold:
+            mark = "  SLOWER"
+            slower.append(name)
+        elif change < -threshold: mark = "  faster"
+        print(f"{name:<30}{o['seconds']:>10.4f}{r['seconds']:>10.4f}{change:>+8.1f}%{mark}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0], help="source lengths (default: 5)")
+    parser.add_argument("--sources", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, best is kept")
+    parser.add_argument("--profile", choices=list(ANALYSIS_PROFILES.keys()), default="quality")
+    parser.add_argument("--precision", choices=["float64", "float32"], default="float64")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="%% change reported as slower/faster (default: 10)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit, "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+            "profile": args.profile, "precision": args.precision,
+            "sources": args.sources, "seconds": args.seconds, "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in args.seconds:
+            print(f"{args.sources} sources x {seconds:g}s ({args.profile}, {args.precision})")
+            report["results"].update(bench_length(seconds, args, tmp))
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        if compare(old, report, args.threshold): return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
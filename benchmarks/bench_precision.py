@@ -0,0 +1,82 @@
+"""
+float64 vs float32 engine precision: time and peak memory per stage.
+
+    python benchmarks/bench_precision.py [--seconds 10] [--sources 4]
+
+Sources are synthetic (harmonic sweeps + noise) written to a temp dir, the
+analysis cache is disabled so both runs do the same work.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_engine import AudioEngine
+
+FX = dict(growl=0.3, tone=-0.3, dist=0.2, ring_freq=120, ring_mix=0.2,
+          delay_time=0.15, delay_fb=0.4, delay_mix=0.25, reverb_mix=0.2, spacer_width=1.2, vol=0.8)
+
+
+def make_sources(out_dir, count, seconds, sr=48000):
+    rng = np.random.RandomState(0)
+    t = np.arange(int(seconds * sr)) / sr
+    paths = []
+    for i in range(count):
+        f0 = 110 * (i + 1) * (1 + 0.3 * np.sin(2 * np.pi * 0.3 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / sr
+        y = sum(np.sin(k * phase) / k for k in range(1, 8)) * 0.2
+        y += rng.randn(len(t)) * 0.01
+        path = os.path.join(out_dir, f"src_{i}.wav")
+        sf.write(path, y, sr)
+        paths.append(path)
+    return paths
+
+
+def run(precision, paths, out_path):
+    engine = AudioEngine(use_cache=False, parallel=False, precision=precision)
+    stages = {}
+
+    def stage(name, fn):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        fn()
+        stages[name] = (time.perf_counter() - t0, (tracemalloc.get_traced_memory()[1] - base) / 1e6)
+
+    tracemalloc.start()
+    stage("load+analyze", lambda: engine.load_sources(paths))
+    stage("morph", lambda: engine.morph(0.3, 0.6, shape="Circle", formant_shift=1.1))
+    stage("fx", lambda: engine.process_pipeline(np.zeros(100), **FX))
+    stage("write", lambda: engine.save_output(out_path))
+    resident = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    return stages, resident
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--sources", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_sources(tmp, args.sources, args.seconds)
+        results = {}
+        for precision in ("float64", "float32"):
+            results[precision] = run(precision, paths, os.path.join(tmp, f"out_{precision}.wav"))
+
+    print(f"{args.sources} sources x {args.seconds:g}s")
+    print(f"{'stage':<14}{'f64 s':>9}{'f32 s':>9}{'f64 MB':>10}{'f32 MB':>10}")
+    s64, s32 = results["float64"][0], results["float32"][0]
+    for name in s64:
+        print(f"{name:<14}{s64[name][0]:>9.3f}{s32[name][0]:>9.3f}{s64[name][1]:>10.1f}{s32[name][1]:>10.1f}")
+    print(f"{'resident':<14}{'':>18}{results['float64'][1]:>10.1f}{results['float32'][1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
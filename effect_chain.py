@@ -0,0 +1,200 @@
+import time
+import numpy as np
+import scipy.signal
+import librosa
+from profiler import stage as profile_stage
+
+
+class FxBuffers:
+    """
+    Work buffers and oscillator tables shared by the effect chains of one engine.
+    Chains are rebuilt whenever a slider moves, so anything that only depends on
+    (length, sr, freq) lives here and survives the rebuild.
+    """
+    def __init__(self, max_tables=8, dtype=np.float64):
+        self.max_tables = max_tables
+        self.dtype = np.dtype(dtype)
+        self._buffers = {}
+        self._tables = {}
+
+    def buffer(self, name, shape):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=self.dtype)
+            self._buffers[name] = buf
+        return buf
+
+    def sine(self, freq, n, sr):
+        return self._table(('sin', float(freq), n, sr),
+                           lambda: np.sin(2 * np.pi * freq * np.linspace(0, n / sr, n)).astype(self.dtype))
+
+    def _table(self, key, make):
+        table = self._tables.pop(key, None)
+        if table is None:
+            table = make()
+            table.setflags(write=False)
+        self._tables[key] = table # (re)insert as most recent
+        while len(self._tables) > self.max_tables:
+            self._tables.pop(next(iter(self._tables)))
+        return table
+
+
+class EffectChain:
+    """
+    process_pipeline() compiled once from its parameters.
+    Disabled stages are dropped at build time, mono stages run in place on a
+    work buffer (engine precision), and every run records per-stage timings (ms).
+    """
+    def __init__(self, engine, pitch_curve_y=None,
+                 speed=1.0,
+                 growl=0.0, tone=0.0,
+                 dist=0.0,
+                 bit_depth=16, bit_rate_div=1,
+                 ring_freq=30, ring_mix=0.0,
+                 delay_time=0.2, delay_fb=0.0, delay_mix=0.0,
+                 reverb_mix=0.0,
+                 spacer_width=1.0,
+                 vol=1.0,
+                 buffers=None, profiler=None):
+        self.engine = engine
+        self.sr = engine.sr
+        self.buffers = buffers if buffers is not None else FxBuffers()
+        self.profiler = profiler # optional StageProfiler
+        self.timings = {}
+        self.stages = []
+
+        # 1. Morph Pitch / 2. Speed produce the base signal (new length possible)
+        curve = np.zeros(1) if pitch_curve_y is None else np.asarray(pitch_curve_y)
+        self._add("pitch", lambda y: self._pitch(y, curve))
+        if abs(speed - 1.0) > 0.01:
+            self._add("speed", lambda y: self._speed(y, speed))
+
+        # 3. Tone & Growl
+        if growl > 0.01:
+            self._add("growl", lambda y: self._growl(y, growl))
+        if abs(tone) > 0.01:
+            nyquist = 0.5 * self.sr
+            if tone > 0: b, a = scipy.signal.butter(1, max(10, 500 * tone)/nyquist, btype='high')
+            else: b, a = scipy.signal.butter(1, (20000 * (1.0 + tone * 0.9) + 100)/nyquist, btype='low')
+            self._add("tone", lambda y: self._filter(y, b, a))
+
+        # 4. Ring Mod
+        if ring_mix > 0.01:
+            self._add("ringmod", lambda y: self._ringmod(y, ring_freq, ring_mix))
+
+        # 5. Bitcrush
+        if bit_rate_div > 1 or bit_depth < 16:
+            self._add("bitcrush", lambda y: self._bitcrush(y, bit_depth, int(bit_rate_div)))
+
+        # 6. Distortion (Tanh)
+        if dist > 0.01:
+            gain = 1 + dist * 10
+            self._add("dist", lambda y: np.tanh(np.multiply(y, gain, out=y), out=y))
+
+        # 7. Delay / 8. Reverb (add tails -> new length)
+        if delay_mix > 0.01 and delay_time >= 0.01:
+            self._add("delay", lambda y: self._work("delay", engine.apply_delay(y, delay_time, delay_fb, delay_mix)))
+        if reverb_mix > 0.01:
+            self._add("reverb", lambda y: self._work("reverb", engine.apply_reverb(y, reverb_mix)))
+
+        # 9. Volume
+        if vol != 1.0:
+            self._add("vol", lambda y: np.multiply(y, vol, out=y))
+
+        # 10. Spacer (makes it stereo) + peak protection
+        self._add("spacer", lambda y: self._spacer(y, spacer_width))
+
+    # Stage name -> StageProfiler name (the rest are recorded as "fx.<name>")
+    PROFILE_NAMES = {"pitch": "pitch", "speed": "stretch"}
+
+    def _add(self, name, fn):
+        self.stages.append((name, fn))
+
+    def run(self, y=None):
+        """Runs the chain on the engine's current morph (y is only used by the OLA pitch fallback)."""
+        self.timings = {}
+        for name, fn in self.stages:
+            t0 = time.perf_counter()
+            with profile_stage(self.profiler, self.PROFILE_NAMES.get(name, "fx." + name)):
+                y = fn(y)
+            self.timings[name] = (time.perf_counter() - t0) * 1000.0
+        return y
+
+    # --- Stages ---
+    def _work(self, name, y):
+        # Copy a freshly produced signal into a shared work buffer
+        # (one per producing stage, so lengths stay stable between runs)
+        buf = self.buffers.buffer(name, (len(y),))
+        buf[:] = y
+        return buf
+
+    def _pitch(self, y, curve):
+        engine = self.engine
+        base = engine.resynthesize_pitch(curve)
+        if base is None:
+            base = engine.apply_pitch_contour(engine.generated_audio.copy(), curve)
+        return self._work("base", base)
+
+    def _speed(self, y, speed):
+        try: return self._work("stretched", librosa.effects.time_stretch(y, rate=speed))
+        except: return y
+
+    def _growl(self, y, growl):
+        tmp = self.buffers.buffer("mod", y.shape)
+        np.multiply(self.buffers.sine(60.0, len(y), self.sr), growl * 0.9, out=tmp)
+        tmp += 1.0
+        y *= tmp
+        return y
+
+    def _filter(self, y, b, a):
+        y[:] = scipy.signal.lfilter(b, a, y)
+        return y
+
+    def _ringmod(self, y, freq, mix):
+        # y*(1-mix) + y*sin*mix == y * ((1-mix) + mix*sin)
+        tmp = self.buffers.buffer("mod", y.shape)
+        np.multiply(self.buffers.sine(freq, len(y), self.sr), mix, out=tmp)
+        tmp += (1 - mix)
+        y *= tmp
+        return y
+
+    def _bitcrush(self, y, depth, div):
+        if div > 1:
+            n = len(y)
+            held = np.repeat(y[::div], div)[:n]
+            y[:] = held
+        if depth < 16:
+            steps = 2 ** depth
+            y *= steps
+            np.round(y, out=y)
+            y /= steps
+        return y
+
+    def _spacer(self, y, width):
+        # Output is a fresh (N, 2) array: it becomes processed_audio and outlives the work buffers
+        n = len(y)
+        out = np.empty((n, 2), dtype=self.buffers.dtype)
+        delay_samp = min(int(0.015 * self.sr), n)
+        l = out[:, 0]
+        r = out[:, 1]
+        l[:] = y
+        r[:delay_samp] = 0
+        r[delay_samp:] = y[:n - delay_samp]
+
+        if width < 0.01: # Mono
+            l += r
+            l *= 0.5
+            r[:] = l
+        elif width != 1.0: # Mid-Side
+            mid = (l + r) / 2.0
+            side = (l - r) / 2.0
+            side *= width
+            np.add(mid, side, out=l)
+            np.subtract(mid, side, out=r)
+
+        # Normalize hard clip protection
+        max_val = np.max(np.abs(out))
+        if max_val > 1.0:
+            out /= max_val
+        return out
+
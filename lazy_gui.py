@@ -12,7 +12,9 @@ import numpy as np
 import json
 import shutil
 import pandas as pd
-from audio_engine import AudioEngine, AudioClassifier
+from audio_engine import AudioEngine, AudioClassifier, ANALYSIS_PROFILES
+from output_writer import AsyncWriter
+from profiler import StageProfiler, stage as profile_stage
 
 # --- Configuration & Theme ---
 ctk.set_appearance_mode("Dark")
@@ -120,9 +122,11 @@ class LazyBatchGUI(ctk.CTk):
             "duration_min": self.entry_min.get(),
             "duration_max": self.entry_max.get(),
             "source_count": self.opt_source_count.get(),
+            "profile": self.opt_profile.get(),
             "chaos": self.slider_chaos.get(),
             "pitch": self.switch_pitch.get(),
             "trim": self.switch_trim.get(),
+            "profile_stages": self.switch_profile.get(),
             "autotag": self.switch_autotag.get(),
             "out_path": self.entry_path.get(),
             "prefix": self.entry_prefix.get(),
@@ -146,6 +150,7 @@ class LazyBatchGUI(ctk.CTk):
             self.entry_max.delete(0, tk.END)
             self.entry_max.insert(0, state.get("duration_max", "10.0"))
             self.opt_source_count.set(state.get("source_count", "Auto (2-4)"))
+            self.opt_profile.set(state.get("profile", "quality"))
             
             # Chaos
             chaos_val = state.get("chaos", 0.5)
@@ -158,6 +163,9 @@ class LazyBatchGUI(ctk.CTk):
             if state.get("trim", 0): self.switch_trim.select()
             else: self.switch_trim.deselect()
             
+            if state.get("profile_stages", 0): self.switch_profile.select()
+            else: self.switch_profile.deselect()
+            
             # Tagging
             if state.get("autotag", 0): self.switch_autotag.select()
             else: self.switch_autotag.deselect()
@@ -402,6 +410,12 @@ class LazyBatchGUI(ctk.CTk):
         self.opt_source_count = ctk.CTkOptionMenu(self.filter_row, values=["Auto (2-4)", "1", "2", "3", "4"], width=100)
         self.opt_source_count.pack(side="left", padx=5)
 
+        # Analysis profile (fast = dio+stonemask, fast_coarse = + 10ms frames)
+        ctk.CTkLabel(self.filter_row, text="Analysis:", width=60).pack(side="left")
+        self.opt_profile = ctk.CTkOptionMenu(self.filter_row, values=list(ANALYSIS_PROFILES.keys()), width=110)
+        self.opt_profile.set("quality")
+        self.opt_profile.pack(side="left", padx=5)
+
         # 3. Chaos Level (Compact)
         self.frame_chaos = ctk.CTkFrame(self)
         self.frame_chaos.pack(fill="x", padx=10, pady=2) 
@@ -427,6 +441,10 @@ class LazyBatchGUI(ctk.CTk):
         self.switch_trim = ctk.CTkSwitch(self.chaos_toggles, text="Trim Silence")
         self.switch_trim.pack(side="left", padx=15)
 
+        # Per-stage time/memory report at batch end
+        self.switch_profile = ctk.CTkSwitch(self.chaos_toggles, text="Profile Stages")
+        self.switch_profile.pack(side="left", padx=15)
+
         # 4. Auto Tagging Settings
         self.frame_tagging = ctk.CTkFrame(self)
         self.frame_tagging.pack(fill="x", padx=10, pady=5)
@@ -570,8 +588,10 @@ class LazyBatchGUI(ctk.CTk):
         self.entry_max.configure(state=state)
         self.slider_chaos.configure(state=state)
         self.opt_source_count.configure(state=state)
+        self.opt_profile.configure(state=state)
         self.switch_pitch.configure(state=state)
         self.switch_trim.configure(state=state)
+        self.switch_profile.configure(state=state)
         self.entry_path.configure(state=state)
         self.switch_autotag.configure(state=state)
         self.btn_reload.configure(state=state)
@@ -596,8 +616,10 @@ class LazyBatchGUI(ctk.CTk):
             prefix = self.entry_prefix.get()
             
             src_mode = self.opt_source_count.get()
+            profile = self.opt_profile.get()
             use_pitch = bool(self.switch_pitch.get())
             trim = bool(self.switch_trim.get())
+            profile_stages = bool(self.switch_profile.get())
             
             use_autotag = bool(self.switch_autotag.get())
             
@@ -618,7 +640,7 @@ class LazyBatchGUI(ctk.CTk):
         self.toggle_ui_state(True)
         
         # Start Thread
-        t = threading.Thread(target=self.batch_worker, args=(d_min, d_max, count, chaos, out_path, prefix, src_mode, use_pitch, trim, use_autotag, tag_list, update_catalog, catalog_name))
+        t = threading.Thread(target=self.batch_worker, args=(d_min, d_max, count, chaos, out_path, prefix, src_mode, use_pitch, trim, use_autotag, tag_list, update_catalog, catalog_name, profile, profile_stages))
         t.daemon = True
         t.start()
 
@@ -627,7 +649,7 @@ class LazyBatchGUI(ctk.CTk):
             self.log("Stopping... please wait for current process.")
             self.stop_event.set()
 
-    def batch_worker(self, d_min, d_max, count, chaos, out_path, prefix, src_mode, use_pitch, trim, use_autotag, tag_list, update_catalog, catalog_name):
+    def batch_worker(self, d_min, d_max, count, chaos, out_path, prefix, src_mode, use_pitch, trim, use_autotag, tag_list, update_catalog, catalog_name, profile="quality", profile_stages=False):
         # 1. Scan and Filter Files
         self.log("Scanning source folders...")
         valid_files = []
@@ -673,6 +695,60 @@ class LazyBatchGUI(ctk.CTk):
                 self.log("Failed to load AI Classifier. Proceeding without tagging.")
                 use_autotag = False
 
+        # Phase 2 (after the file is on disk): Classification & Move
+        # Runs on the writer thread, so the next render overlaps disk I/O and tagging
+        def on_written(fpath, ok, msg):
+            if not ok:
+                self.log(f"-> Write failed: {msg}")
+                return
+            if not (use_autotag and classifier):
+                self.log(f"-> Saved: {os.path.basename(fpath)}")
+                return
+            
+            # 2a. Classify
+            with profile_stage(profiler, "tag"):
+                tag = classifier.classify(fpath, tag_list)
+            self.log(f"   Classified as: [{tag}]")
+            
+            # 2b. Create Tag Folder
+            tag_dir = os.path.join(out_path, tag)
+            os.makedirs(tag_dir, exist_ok=True)
+            
+            # 2c. Determine new filename based on TAG
+            # Format: TagName_001.wav
+            safe_tag = "".join([c if c.isalnum() else "_" for c in tag])
+            tag_prefix = f"{safe_tag}_"
+            
+            # scan existing in tag_dir using the TAG prefix
+            existing = glob.glob(os.path.join(tag_dir, f"{safe_tag}_*.wav"))
+            
+            max_idx = 0
+            for ef in existing:
+                try:
+                    base = os.path.basename(ef)
+                    # Expected: Tag_NNN.wav
+                    if base.startswith(tag_prefix):
+                        rem = base[len(tag_prefix):]
+                        name_part, _ = os.path.splitext(rem)
+                        if name_part.isdigit():
+                            v = int(name_part)
+                            if v > max_idx: max_idx = v
+                except: pass
+                
+            new_idx = max_idx + 1
+            new_name = f"{safe_tag}_{new_idx:03d}.wav"
+            new_full_path = os.path.join(tag_dir, new_name)
+            
+            # 2d. Move
+            try:
+                shutil.move(fpath, new_full_path)
+                self.log(f"-> Moved to {tag}/{new_name}")
+            except OSError as e:
+                self.log(f"-> Move failed: {e}")
+        
+        profiler = StageProfiler(memory=True) if profile_stages else None
+        writer = AsyncWriter(profiler=profiler)
+
         # 2. Main Loop
         for i in range(count):
             if self.stop_event.is_set():
@@ -682,7 +758,8 @@ class LazyBatchGUI(ctk.CTk):
             self.log(f"Generating {i+1}/{count}...")
             
             # Init Engine per iteration
-            engine = AudioEngine()
+            engine = AudioEngine(profile=profile)
+            engine.profiler = profiler
             
             try:
                 # determine num sources
@@ -699,11 +776,8 @@ class LazyBatchGUI(ctk.CTk):
                      
                 sources = random.sample(valid_files, actual_pick)
                 
-                # Load Sources
-                if len(sources) >= 1: engine.load_source_a(sources[0])
-                if len(sources) >= 2: engine.load_source_b(sources[1])
-                if len(sources) >= 3: engine.load_source_c(sources[2])
-                if len(sources) >= 4: engine.load_source_d(sources[3])
+                # Load Sources (A-D analyzed concurrently)
+                engine.load_sources(sources)
                 
                 # Chaos Mapping
                 # Morph X/Y
@@ -803,66 +877,29 @@ class LazyBatchGUI(ctk.CTk):
                     speed, growl, tone, dist, 
                     bit_depth, bit_rate_div, ring_freq, ring_mix,
                     delay_time, delay_fb, delay_mix, reverb_mix, spacer_width, vol,
-                    trim_silence=trim
+                    trim_silence=trim,
+                    writer=writer, callback=on_written
                 )
                 
-                if success:
-                    final_path = fpath
-                    
-                    # Phase 2: Classification & Move
-                    if use_autotag and classifier:
-                        # 2a. Classify
-                        tag = classifier.classify(fpath, tag_list)
-                        self.log(f"   Classified as: [{tag}]")
-                        
-                        # 2b. Create Tag Folder
-                        tag_dir = os.path.join(out_path, tag)
-                        os.makedirs(tag_dir, exist_ok=True)
-                        
-                        # 2c. Determine new filename based on TAG
-                        # Format: TagName_001.wav
-                        safe_tag = "".join([c if c.isalnum() else "_" for c in tag])
-                        tag_prefix = f"{safe_tag}_"
-                        
-                        # scan existing in tag_dir using the TAG prefix
-                        existing = glob.glob(os.path.join(tag_dir, f"{safe_tag}_*.wav"))
-                        
-                        max_idx = 0
-                        for ef in existing:
-                            try:
-                                base = os.path.basename(ef)
-                                # Expected: Tag_NNN.wav
-                                if base.startswith(tag_prefix):
-                                    rem = base[len(tag_prefix):]
-                                    name_part, _ = os.path.splitext(rem)
-                                    if name_part.isdigit():
-                                        v = int(name_part)
-                                        if v > max_idx: max_idx = v
-                            except: pass
-                            
-                        new_idx = max_idx + 1
-                        new_name = f"{safe_tag}_{new_idx:03d}.wav"
-                        new_full_path = os.path.join(tag_dir, new_name)
-                        
-                        # 2d. Move
-                        try:
-                            shutil.move(fpath, new_full_path)
-                            final_path = new_full_path
-                            self.log(f"-> Moved to {tag}/{new_name}")
-                        except OSError as e:
-                            self.log(f"-> Move failed: {e}")
-                    else:
-                        self.log(f"-> Saved: {base_fname}")
-
-                else:
+                if not success:
                     self.log(f"-> Error: {msg}")
 
             except Exception as e:
                 self.log(f"-> Critical Error: {str(e)}")
                 
         # --- End of Batch Loop ---
+        writer.close() # pending writes / tagging
         self.log("Batch processing finished.")
         
+        if profiler is not None:
+            profiler.close()
+            for line in profiler.summary().splitlines(): self.log(line)
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            try:
+                for ext in ("json", "csv"):
+                    profiler.save(os.path.join(out_path, f"batch_profile_{stamp}.{ext}"))
+            except OSError as e: self.log(f"Profile export failed: {e}")
+        
         # 3. Catalog Auto-Update
         if update_catalog:
              if not self.stop_event.is_set():
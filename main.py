@@ -10,7 +10,10 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 from tkinterdnd2 import DND_FILES, TkinterDnD
-from audio_engine import AudioEngine
+from audio_engine import AudioEngine, ANALYSIS_PROFILES
+from output_writer import AsyncWriter
+from profiler import StageProfiler
+import trajectories
 from scipy.interpolate import PchipInterpolator
 import time
 import json
@@ -56,6 +59,8 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
         self.pitch_curve_y = np.zeros(100)
         self.autoplay_morph = False
         self.is_morphing_busy = False
+        self.morph_lock = threading.Lock() # one morph at a time (drafts while dragging, full on release)
+        self.morph_seq = 0 # latest requested morph; stale drafts are dropped
         self.is_batch_running = False
         self.morph_x = 0.5
         self.morph_y = 0.5
@@ -416,8 +421,14 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
         f_mot = ctk.CTkFrame(self.col_source, fg_color="transparent")
         f_mot.pack(fill="x", pady=(5,0))
         ctk.CTkLabel(f_mot, text="MOTION", font=("Roboto", 10), width=50).pack(side="left")
-        self.cmb_shape = ctk.CTkOptionMenu(f_mot, values=["Static", "RandomPoint", "Circle", "Eight", "Scan", "RandomMovement"], width=130, height=24)
+        self.cmb_shape = ctk.CTkOptionMenu(f_mot, values=trajectories.shape_names(), width=130, height=24)
         self.cmb_shape.set("Static"); self.cmb_shape.pack(side="left", padx=2)
+        # User trajectories: draw one on the pad (next stroke) or load a .json/.csv path
+        self.draw_mode = False
+        self.drawn_points = []
+        self.btn_draw = ctk.CTkButton(f_mot, text="✏", width=24, height=24, fg_color="#444", command=self.toggle_draw_mode)
+        self.btn_draw.pack(side="left", padx=1)
+        ctk.CTkButton(f_mot, text="📂", width=24, height=24, fg_color="#444", command=self.load_trajectory).pack(side="left", padx=1)
         
         self.slider_mspeed = ctk.CTkSlider(self.col_source, from_=0.1, to=5.0, height=16); self.slider_mspeed.set(1.0); self.slider_mspeed.pack(pady=(2,0))
         
@@ -430,6 +441,22 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
         ctk.CTkCheckBox(f_chk, text="Auto Morph", variable=self.var_auto_morph, font=("Roboto",10), width=80, height=20).pack(side="left", padx=5)
         ctk.CTkCheckBox(f_chk, text="Auto Apply", variable=self.var_auto_apply, font=("Roboto",10), width=80, height=20).pack(side="left", padx=5)
         
+        # Compact (coded envelope) morph domain: lighter/faster, slightly smoother timbre
+        self.var_coded_morph = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self.col_source, text="Compact Morph (Coded)", variable=self.var_coded_morph, font=("Roboto",10), height=20,
+                        command=lambda: setattr(self.engine, "morph_domain", "coded" if self.var_coded_morph.get() else "full")).pack(pady=(2,0))
+        
+        # DTW alignment: pair frames by timbre instead of relative position (sources with different timing)
+        self.var_dtw_align = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self.col_source, text="DTW Align", variable=self.var_dtw_align, font=("Roboto",10), height=20,
+                        command=lambda: self.engine.set_align_mode("dtw" if self.var_dtw_align.get() else "linear")).pack(pady=(2,0))
+        
+        # Analysis profile: quality (harvest) / fast (dio+stonemask) / fast_coarse (10ms frames)
+        self.opt_profile = ctk.CTkOptionMenu(self.col_source, values=list(ANALYSIS_PROFILES.keys()), command=self.set_analysis_profile,
+                                             font=("Roboto",10), height=20, width=120)
+        self.opt_profile.set(self.engine.profile)
+        self.opt_profile.pack(pady=(2,0))
+        
         self.btn_morph = ctk.CTkButton(self.col_source, text="MORPH (G)", command=lambda: self.trigger_morph(self.var_auto_apply.get()), fg_color="#E53935", height=32, font=("Roboto",12,"bold"))
         self.btn_morph.pack(fill="x", padx=10, pady=(5, 2))
         
@@ -691,6 +718,10 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
         add_rng("bits", "BitDepth", 12, 16, 4, 32)
         add_rng("srdiv", "SR Div", 1, 4, 1, 50)
         
+        # Per-stage time/memory report (console + <prefix>_profile.json/.csv in the output dir)
+        self.var_profile_batch = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self.col_batch, text="Profile Stages", variable=self.var_profile_batch, font=("Roboto",10), height=20).pack(pady=(5,0))
+        
         self.prog_batch = ctk.CTkProgressBar(self.col_batch, progress_color="#FFA726")
         self.prog_batch.set(0)
         self.prog_batch.pack(fill="x", padx=10, pady=5)
@@ -700,45 +731,108 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
 
     # ================= LOGIC HANDLERS =================
     
-    def load_generic(self, f, btn):
-        p = filedialog.askopenfilename()
-        if p: f(p); btn.configure(text=os.path.basename(p))
-    def load_a(self, path=None): 
-        if not path: path=filedialog.askopenfilename()
-        if path: 
-            self.engine.load_source(0, path); self.btn_a.configure(text=os.path.basename(path))
-            self.update_waveform_bg()
-    def load_b(self, p=None): 
-        if p: self.engine.load_source_b(p); self.btn_b.configure(text=os.path.basename(p))
-        else: self.load_generic(self.engine.load_source_b, self.btn_b)
-    def load_c(self, p=None): 
-        if p: self.engine.load_source_c(p); self.btn_c.configure(text=os.path.basename(p))
-        else: self.load_generic(self.engine.load_source_c, self.btn_c)
-    def load_d(self, p=None): 
-        if p: self.engine.load_source_d(p); self.btn_d.configure(text=os.path.basename(p))
-        else: self.load_generic(self.engine.load_source_d, self.btn_d)
+    def set_analysis_profile(self, profile):
+        # Loaded sources are re-analyzed in the background (cache hits are instant)
+        self.lbl_status.configure(text=f"Analysis profile: {profile}")
+        def work():
+            try:
+                self.engine.set_profile(profile)
+                self.engine.wait_analysis()
+                self.after(0, lambda: self.lbl_status.configure(text=f"Analysis profile: {profile} (ready)"))
+            except Exception as e:
+                err = str(e)
+                self.after(0, lambda: messagebox.showerror("Err", err))
+        threading.Thread(target=work, daemon=True).start()
+
+    def load_generic(self, index, btn, path=None):
+        if not path: path = filedialog.askopenfilename()
+        if not path: return
+        # File read + WORLD analysis run off the GUI thread; morph() joins pending results
+        btn.configure(text="Loading...")
+        self.lbl_status.configure(text=f"Analyzing {os.path.basename(path)}...")
+        def work():
+            try:
+                self.engine.load_source_async(index, path)
+                self.engine.wait_analysis()
+                self.after(0, lambda: self.load_done(index, path, btn))
+            except Exception as e:
+                err = str(e)
+                self.after(0, lambda: btn.configure(text="Load Failed"))
+                self.after(0, lambda: messagebox.showerror("Err", err))
+        threading.Thread(target=work, daemon=True).start()
+    def load_done(self, index, path, btn):
+        btn.configure(text=os.path.basename(path))
+        self.lbl_status.configure(text=f"Loaded {os.path.basename(path)}")
+        if index == 0: self.update_waveform_bg()
+    def load_a(self, path=None): self.load_generic(0, self.btn_a, path)
+    def load_b(self, p=None): self.load_generic(1, self.btn_b, p)
+    def load_c(self, p=None): self.load_generic(2, self.btn_c, p)
+    def load_d(self, p=None): self.load_generic(3, self.btn_d, p)
         
     def on_drop(self, event, func):
         path = event.data
         if path.startswith('{') and path.endswith('}'): path = path[1:-1]
-        try: func(path); self.lbl_status.configure(text=f"Loaded {os.path.basename(path)}")
+        try: func(path)
         except Exception as e: messagebox.showerror("Err", str(e))
 
-    def on_xy_click(self, e): self.set_xy(e)
+    def on_xy_click(self, e):
+        if self.draw_mode: self.draw_point(e, first=True); return
+        self.set_xy(e)
     def on_xy_drag(self, e): 
+        if self.draw_mode: self.draw_point(e); return
         self.set_xy(e)
         if self.var_auto_morph.get():
-            self.trigger_morph(False, True)
+            self.trigger_morph(False, True) # low-res draft, full render follows on release
             
     def on_xy_release(self, e): 
         # Always trigger on release if not already triggering? Or just ensure final pos is morphed.
         # If auto_morph is Off, we definitely want to morph on release (if that was the intention).
         # Actually user usually expects drag to move point, release to morph if not realtime.
+        if self.draw_mode: self.finish_drawing(); return
         self.trigger_morph(False, False)
     def set_xy(self, e):
         w = 200
         self.morph_x = max(0.0, min(1.0, e.x/w)); self.morph_y = max(0.0, min(1.0, e.y/w))
         self.update_xy_visuals(); self.cmb_shape.set("Static")
+    # --- User trajectories ---
+    def toggle_draw_mode(self):
+        self.draw_mode = not self.draw_mode
+        self.btn_draw.configure(fg_color="#E53935" if self.draw_mode else "#444")
+        self.lbl_status.configure(text="Draw a path on the MORPH PAD." if self.draw_mode else "")
+    
+    def draw_point(self, e, first=False):
+        w = 200
+        x = max(0.0, min(1.0, e.x/w)); y = max(0.0, min(1.0, e.y/w))
+        if first:
+            self.drawn_points = []
+            self.canvas_xy.delete("path")
+        elif self.drawn_points:
+            px, py = self.drawn_points[-1]
+            self.canvas_xy.create_line(px*w, py*w, x*w, y*w, fill="#FFA726", width=2, tags="path")
+        self.drawn_points.append((x, y))
+        self.morph_x, self.morph_y = x, y
+        self.update_xy_visuals()
+    
+    def finish_drawing(self):
+        self.toggle_draw_mode()
+        if len(self.drawn_points) < 2: return
+        # Stretched over the whole sound (Motion speed is ignored)
+        trajectories.register_path("Drawn", self.drawn_points)
+        self.use_trajectory("Drawn")
+        self.trigger_morph(self.var_auto_apply.get())
+    
+    def load_trajectory(self):
+        p = filedialog.askopenfilename(filetypes=[("Trajectory", "*.json *.csv *.txt"), ("All", "*.*")])
+        if not p: return
+        try: name = trajectories.load_path(p)
+        except Exception as e: messagebox.showerror("Err", f"Trajectory load failed: {e}"); return
+        self.use_trajectory(name)
+    
+    def use_trajectory(self, name):
+        self.cmb_shape.configure(values=trajectories.shape_names())
+        self.cmb_shape.set(name)
+        self.lbl_status.configure(text=f"Trajectory: {name}")
+
     def update_xy_visuals(self):
         w = 200
         self.canvas_xy.coords(self.xy_handle, self.morph_x*w-8, self.morph_y*w-8, self.morph_x*w+8, self.morph_y*w+8)
@@ -747,21 +841,30 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
         if self.engine.y_a is None: return
         if from_drag and self.is_morphing_busy: return
         self.is_morphing_busy = True; self.autoplay_morph = autoplay
+        self.morph_seq += 1
         self.btn_morph.configure(text="...", state="disabled")
-        threading.Thread(target=self.run_morph, args=(self.cmb_shape.get(), self.slider_mspeed.get(), self.sl_formant.get(), self.sl_breath.get()), daemon=True).start()
+        threading.Thread(target=self.run_morph, args=(self.cmb_shape.get(), self.slider_mspeed.get(), self.sl_formant.get(), self.sl_breath.get(), from_drag, self.morph_seq), daemon=True).start()
         
-    def run_morph(self, shp, spd, fmt, brt):
+    def run_morph(self, shp, spd, fmt, brt, draft=False, seq=0):
+        ms = 0.0
         try:
-            self.engine.morph(self.morph_x, self.morph_y, shape=shp, speed=spd, formant_shift=fmt, breath=brt)
-            self.after(0, self.morph_complete)
+            with self.morph_lock:
+                # A newer request (e.g. the release render) supersedes a pending draft
+                if draft and seq != self.morph_seq: return
+                t0 = time.perf_counter()
+                morph = self.engine.morph_draft if draft else self.engine.morph
+                morph(self.morph_x, self.morph_y, shape=shp, speed=spd, formant_shift=fmt, breath=brt)
+                ms = (time.perf_counter() - t0) * 1000.0
+            self.after(0, lambda: self.morph_complete(seq, draft, ms))
         except Exception as e:
              self.after(0, lambda: messagebox.showerror("Err", str(e)))
-             self.after(0, self.morph_complete)
+             self.after(0, lambda: self.morph_complete(seq, draft, ms))
              
-    def morph_complete(self):
+    def morph_complete(self, seq=None, draft=False, ms=0.0):
+        if seq is not None and seq != self.morph_seq: return # a newer morph is still running
         self.is_morphing_busy = False
         self.btn_apply.configure(state="normal"); self.btn_preview.configure(state="normal"); self.btn_morph.configure(text="MORPH (G)", state="normal")
-        self.lbl_status.configure(text="Morph Done.")
+        self.lbl_status.configure(text=f"Draft preview ({ms:.0f} ms)" if draft else "Morph Done.")
         if self.engine.generated_audio is not None:
              dur = len(self.engine.generated_audio)/self.engine.sr
              self.ax.set_xlabel(f"Time ({dur:.2f}s)"); self.canvas_chart.draw()
@@ -791,7 +894,8 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
             self.after(0, lambda: messagebox.showerror("Err", str(e))); self.after(0, self.apply_done)
             
     def apply_done(self):
-        self.btn_apply.configure(state="normal"); self.lbl_status.configure(text="Applied FX.")
+        fx_ms = sum(self.engine.last_fx_timings.values())
+        self.btn_apply.configure(state="normal"); self.lbl_status.configure(text=f"Applied FX. ({fx_ms:.0f} ms)")
         if self.autoplay_morph: self.play_preview(); self.autoplay_morph = False
 
     def chaos_action(self, e=None):
@@ -882,9 +986,9 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
         # Restore Trajectory Visualization
         pos_ms = pygame.mixer.music.get_pos()
         # map ms to frame index roughly
-        # frame_period in audio_engine is 5.0 ms
+        # one trajectory point per analysis frame (engine.frame_period ms)
         if pos_ms >= 0 and self.engine.last_trajectory_x is not None:
-             idx = int(pos_ms / 5.0) 
+             idx = int(pos_ms / self.engine.frame_period) 
              if idx < len(self.engine.last_trajectory_x):
                  self.morph_x = self.engine.last_trajectory_x[idx]
                  self.morph_y = self.engine.last_trajectory_y[idx]
@@ -1079,7 +1183,8 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
         threading.Thread(target=self.batch_worker, args=(cnt, self.b_pre.get()), daemon=True).start()
 
     def batch_worker(self, cnt, pre):
-        shapes = ["Circle", "Eight", "Scan", "RandomMovement", "RandomPoint", "Static"]
+        # Built-in moving shapes + loaded/drawn paths (weight tables are cached per shape/speed/length)
+        shapes = ["Circle", "Eight", "Scan", "RandomMovement", "RandomPoint"] + trajectories.user_shapes()
         
         def r(key):
             try:
@@ -1088,28 +1193,64 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
                 return random.uniform(mn, mx) if mn != mx else mn
             except: return 0.0
             
+        # Draw every job up front so the morphs of a chunk can be rendered together
+        jobs = []
         for i in range(cnt):
-            self.after(0, lambda v=(i+1)/cnt: self.prog_batch.set(v))
-            self.after(0, lambda c=i+1: self.lbl_status.configure(text=f"Batch {c}/{cnt}..."))
-            
             x = r("morph_x"); y = r("morph_y")
-            shape = shapes[random.randint(0,4)] if random.random() > 0.5 else "Static"
-            
-            p_curve = np.zeros(100)
+            shape = shapes[random.randint(0, len(shapes) - 1)] if random.random() > 0.5 else "Static"
             
             # Use Random point logic if shape is RandomPoint
             if shape == "RandomPoint":
                 x = random.random(); y = random.random()
-
-            self.engine.render_batch_sample(
-                os.path.join(self.outdir, f"{pre}_{i+1:03d}.wav"),
-                x, y, shape, r("mspeed"),
-                r("formant"), r("breath"), p_curve,
-                r("speed"), r("growl"), r("tone"), r("dist"),
-                r("bits"), r("srdiv"), r("ring_freq"), r("ring_mix"),
-                r("d_time"), r("d_fb"), r("d_mix"), r("reverb"), r("spacer"),
-                r("vol")
-            )
+            
+            jobs.append({
+                "morph": {"x": x, "y": y, "shape": shape, "speed": r("mspeed"),
+                          "formant_shift": r("formant"), "breath": r("breath")},
+                "fx": (r("speed"), r("growl"), r("tone"), r("dist"),
+                       r("bits"), r("srdiv"), r("ring_freq"), r("ring_mix"),
+                       r("d_time"), r("d_fb"), r("d_mix"), r("reverb"), r("spacer"),
+                       r("vol"))
+            })
+        
+        chunk = 8
+        profiler = StageProfiler(memory=True) if self.var_profile_batch.get() else None
+        self.engine.profiler = profiler
+        # Files are written on a background thread while the next renders run
+        writer = AsyncWriter(profiler=profiler)
+        for c0 in range(0, cnt, chunk):
+            block = jobs[c0:c0 + chunk]
+            # One vectorized morph pass for the whole chunk (same sources)
+            try: morphed = self.engine.morph_many([j["morph"] for j in block], chunk_size=chunk)
+            except Exception as e:
+                print(f"morph_many failed, falling back to per-sample morph: {e}")
+                morphed = []
+            
+            for k, job in enumerate(block):
+                i = c0 + k
+                self.after(0, lambda v=(i+1)/cnt: self.prog_batch.set(v))
+                self.after(0, lambda c=i+1: self.lbl_status.configure(text=f"Batch {c}/{cnt}..."))
+                
+                p_curve = np.zeros(100)
+                m = job["morph"]
+                self.engine.render_batch_sample(
+                    os.path.join(self.outdir, f"{pre}_{i+1:03d}.wav"),
+                    m["x"], m["y"], m["shape"], m["speed"],
+                    m["formant_shift"], m["breath"], p_curve,
+                    *job["fx"],
+                    morphed=morphed[k] if k < len(morphed) else None,
+                    writer=writer
+                )
+        writer.close()
+        for fp, err in writer.errors: print(f"Batch write failed: {fp}: {err}")
+        
+        if profiler is not None:
+            self.engine.profiler = None
+            profiler.close()
+            print(profiler.summary())
+            try:
+                for ext in ("json", "csv"):
+                    profiler.save(os.path.join(self.outdir, f"{pre}_profile.{ext}"))
+            except OSError as e: print(f"Profile export failed: {e}")
             
         self.is_batch_running = False
         self.after(0, lambda: self.btn_batch.configure(state="normal", text="🚀 RUN BATCH"))
@@ -1247,8 +1388,14 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
             "batch": {k: (v[0].get(), v[1].get()) for k,v in self.batch_ranges.items()}
         }
         s["morph"] = {"x":self.morph_x, "y":self.morph_y, "shape":self.cmb_shape.get()}
+        paths = {}
+        for name in trajectories.user_shapes():
+            info = trajectories.path_points(name)
+            if info is not None: paths[name] = {"points": np.round(info[0], 4).tolist(), "loop": info[1]}
+        s["morph"]["paths"] = paths
         s["pitch"] = self.pitch_points
         s["pitch_range"] = self.pitch_range
+        s["profile"] = self.engine.profile
         return s
 
     def set_state(self, s):
@@ -1272,8 +1419,14 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
                         self.batch_ranges[k][1].delete(0,tk.END); self.batch_ranges[k][1].insert(0, str(val[1]))
             
             m = s.get("morph", {})
+            for name, p in m.get("paths", {}).items():
+                try: trajectories.register_path(name, p["points"], loop=p.get("loop", False))
+                except Exception as e: print(f"Trajectory {name} skipped: {e}")
+            self.cmb_shape.configure(values=trajectories.shape_names())
             self.morph_x = m.get("x",0.5); self.morph_y = m.get("y",0.5)
-            self.cmb_shape.set(m.get("shape","Static")); self.update_xy_visuals()
+            shape = m.get("shape","Static")
+            if shape not in trajectories.shape_names(): shape = "Static" # path skipped above
+            self.cmb_shape.set(shape); self.update_xy_visuals()
             
             self.pitch_points = s.get("pitch", [[0,0],[100,0]])
             
@@ -1281,6 +1434,10 @@ class App(ctk.CTk, TkinterDnD.DnDWrapper):
             self.ent_prange.delete(0, tk.END); self.ent_prange.insert(0, str(pr))
             self.update_pitch_range_ui() # this sets self.pitch_range and redraws curve
             
+            prof = s.get("profile", self.engine.profile)
+            if prof in ANALYSIS_PROFILES and prof != self.engine.profile:
+                self.opt_profile.set(prof); self.set_analysis_profile(prof)
+            
         except Exception as e: print(e)
 
     def save_settings(self):
@@ -3,20 +3,103 @@ import librosa
 import soundfile as sf
 import pyworld as pw
 import scipy.signal
+import os
+import atexit
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from processors import PolarSTFT, MorphProcessors, quefrency, spectral_envelope, unit_phasor
+
+# Spectra LRU budget per STFT cell and slot: stft + mag + phasor (16 + 8 + 16), or
+# stft + mag + quefrency (one bin more) + envelope for cross synthesis (+ 16 + 8, no phasor),
+# + 8 for the previous envelope while the smoothness slider moves
+SPECTRA_CELL_BYTES = 56
+SWEEP_BYTES = 256 * 1024 ** 2 # result spectra computed per sweep chunk
+BLOCK_FRAMES = 2048 # frames per block of the out-of-core pipeline (~34 MB complex128 at n_fft 2048)
+
+
+class BlockISTFT:
+    """
+    Overlap-add inverse STFT fed block by block (center=True, hann, like librosa.istft).
+    push() returns the samples no later frame can touch any more, finish() the rest;
+    only about n_fft samples are kept between blocks.
+    """
+    def __init__(self, n_fft, hop_length, n_frames):
+        self.n_fft = n_fft
+        self.hop = hop_length
+        self.length = hop_length * (n_frames - 1) # librosa.istft length without length=
+        self.window = librosa.filters.get_window('hann', n_fft, fftbins=True)
+        self.window_sq = self.window ** 2
+        self._acc = np.zeros(0)
+        self._env = np.zeros(0)
+        self._pos = 0 # padded sample index of _acc[0]
+        self._emitted = 0 # output samples returned so far
+
+    def push(self, t0, block):
+        """block: (bins, frames) spectra of frames t0, t0+1, ..."""
+        frames = np.fft.irfft(block, n=self.n_fft, axis=0) * self.window[:, np.newaxis]
+        if len(self._acc) == 0: self._acc = np.zeros(0, dtype=frames.dtype)
+        start = t0 * self.hop - self._pos
+        end = start + (frames.shape[1] - 1) * self.hop + self.n_fft
+        if end > len(self._acc):
+            self._acc = np.concatenate((self._acc, np.zeros(end - len(self._acc), dtype=self._acc.dtype)))
+            self._env = np.concatenate((self._env, np.zeros(end - len(self._env))))
+        for j in range(frames.shape[1]):
+            k = start + j * self.hop
+            self._acc[k:k + self.n_fft] += frames[:, j]
+            self._env[k:k + self.n_fft] += self.window_sq
+        # Everything before the next frame's start is final
+        return self._emit((t0 + frames.shape[1]) * self.hop - self._pos)
+
+    def finish(self):
+        return self._emit(len(self._acc))
+
+    def _emit(self, n):
+        y, env = self._acc[:n], self._env[:n]
+        nz = env > np.finfo(y.dtype).tiny
+        y = y.copy()
+        y[nz] /= env[nz]
+        self._acc, self._env = self._acc[n:], self._env[n:]
+        # Padded -> output coordinates (drop n_fft // 2 in front, cut at length)
+        lo = max(0, self.n_fft // 2 - self._pos)
+        self._pos += n
+        y = y[lo:][:self.length - self._emitted]
+        self._emitted += len(y)
+        return y
+
 
 class MorphCore:
-    def __init__(self, sr=48000, frame_period=5.0):
+    def __init__(self, sr=48000, frame_period=5.0, max_spectra_bytes=None):
         self.sr = sr
         self.frame_period = frame_period
         
         # Caches
-        self.source_a = None # { 'audio': np.array, 'stft': np.array, 'world': dict }
+        self.source_a = None # { 'audio': np.array, 'world': dict, 'len': int }
         self.source_b = None
         self.result_audio = None
         
         # Settings
         self.n_fft = 2048
         self.hop_length = int(self.sr * (self.frame_period / 1000.0))
+        
+        # Out-of-core: (slot, n_fft, hop) -> .npy memmap of (frames, bins) spectra
+        self._spilled = {}
+        self.spill_dir = None # None = system temp dir
+        self.long_seconds = 60.0 # GUI switches to the block pipeline above this
+        atexit.register(self.clear_spill)
+        
+        # Spectra LRU: (slot, kind, n_fft, hop) -> read-only array, kind = stft / mag / phasor /
+        # quefrency / ('env', smoothness).
+        # Slider sweeps reuse them, so only the blend arithmetic runs per move.
+        # Default budget: both slots up to long_seconds (~1.4 GB at 48 kHz), longer sources
+        # go through the block pipeline instead.
+        self._spectra = {}
+        self._spectra_bytes = 0
+        if max_spectra_bytes is None:
+            frames = 1 + int(self.long_seconds * self.sr) // self.hop_length
+            max_spectra_bytes = 2 * frames * (1 + self.n_fft // 2) * SPECTRA_CELL_BYTES
+        self.max_spectra_bytes = max_spectra_bytes
+        self._spectra_lock = threading.RLock()
 
     def load_source(self, filepath, slot='A'):
         """Loads audio and performs initial lightweight analysis."""
@@ -36,29 +119,237 @@ class MorphCore:
             # Store
             data = {
                 'audio': y_mono, 
-                'stft': None,   # Lazy load
                 'world': None,  # Lazy load
                 'len': len(y_mono)
             }
             
             if slot == 'A': self.source_a = data
             elif slot == 'B': self.source_b = data
+            self.clear_spectra(slot)
+            self.clear_spill(slot)
             
             return True, f"Loaded {len(y_mono)/self.sr:.2f}s"
         except Exception as e:
             return False, str(e)
 
-    def get_stft(self, slot='A'):
-        """Lazy computes STFT."""
+    def get_stft(self, slot='A', n_fft=None, hop_length=None):
+        """Lazy computes STFT (cached per (n_fft, hop) config, read-only)."""
+        n_fft = n_fft or self.n_fft
+        hop_length = hop_length or self.hop_length
         src = self.source_a if slot == 'A' else self.source_b
         if src is None: return None
         
-        if src['stft'] is None:
-            # Compute STFT
+        def compute():
             # Complex STFT: (1 + n_fft/2, frames)
-            src['stft'] = librosa.stft(src['audio'], n_fft=self.n_fft, hop_length=self.hop_length)
-            
-        return src['stft']
+            return librosa.stft(src['audio'], n_fft=n_fft, hop_length=hop_length)
+        return self._cached((slot, 'stft', n_fft, hop_length), compute)
+
+    def get_polar(self, slot='A', n_fft=None, hop_length=None):
+        """STFT + magnitude / unit phasor (stft / |stft|) of a slot, all cached."""
+        n_fft = n_fft or self.n_fft
+        hop_length = hop_length or self.hop_length
+        stft = self.get_stft(slot, n_fft, hop_length)
+        if stft is None: return None
+        
+        mag = self.get_mag(slot, n_fft, hop_length)
+        phasor = self._cached((slot, 'phasor', n_fft, hop_length), lambda: unit_phasor(stft, mag))
+        return PolarSTFT(stft, mag, phasor)
+
+    def get_mag(self, slot='A', n_fft=None, hop_length=None):
+        """Magnitude of a slot's STFT, cached."""
+        n_fft = n_fft or self.n_fft
+        hop_length = hop_length or self.hop_length
+        stft = self.get_stft(slot, n_fft, hop_length)
+        if stft is None: return None
+        return self._cached((slot, 'mag', n_fft, hop_length), lambda: np.abs(stft))
+
+    def get_phase(self, slot='A', n_fft=None, hop_length=None):
+        """Phase of a slot's STFT, on demand (not cached; the processors use the phasor)."""
+        stft = self.get_stft(slot, n_fft, hop_length)
+        return None if stft is None else np.angle(stft)
+
+    def get_envelope(self, slot='A', smoothness=10, n_fft=None, hop_length=None):
+        """Spectral envelope (gaussian over frequency, cepstral lifter) of a slot, cached per smoothness."""
+        n_fft = n_fft or self.n_fft
+        hop_length = hop_length or self.hop_length
+        # Magnitude only: the phasor is not needed (and not budgeted) for cross synthesis
+        mag = self.get_mag(slot, n_fft, hop_length)
+        if mag is None: return None
+        # The quefrency transform is shared by every smoothness value
+        q = self._cached((slot, 'quefrency', n_fft, hop_length), lambda: quefrency(mag))
+        return self._cached((slot, ('env', float(smoothness)), n_fft, hop_length),
+                            lambda: spectral_envelope(mag, smoothness, q))
+
+    def _cached(self, key, compute):
+        with self._spectra_lock:
+            arr = self._spectra.pop(key, None)
+            if arr is None:
+                arr = compute()
+                arr.setflags(write=False)
+                self._spectra_bytes += arr.nbytes
+            self._spectra[key] = arr # most recent last
+            # Evict oldest, but never the array just asked for
+            while self._spectra_bytes > self.max_spectra_bytes and len(self._spectra) > 1:
+                self._spectra_bytes -= self._spectra.pop(next(iter(self._spectra))).nbytes
+            return arr
+
+    def clear_spectra(self, slot=None):
+        """Drops cached spectra of a slot (all slots if None)."""
+        with self._spectra_lock:
+            for key in [k for k in self._spectra if slot is None or k[0] == slot]:
+                self._spectra_bytes -= self._spectra.pop(key).nbytes
+
+    # ---------- Out-of-core (block-wise) pipeline ----------
+    def n_frames(self, slot='A', hop_length=None):
+        src = self.source_a if slot == 'A' else self.source_b
+        if src is None: return 0
+        return 1 + src['len'] // (hop_length or self.hop_length)
+
+    def is_long(self):
+        limit = self.long_seconds * self.sr
+        return any(src is not None and src['len'] > limit for src in (self.source_a, self.source_b))
+
+    def stft_blocks(self, slot='A', block_frames=BLOCK_FRAMES, n_fft=None, hop_length=None):
+        """
+        Yields (t0, stft block (bins, frames)) in order; the blocks are the same
+        frames as get_stft() (center=True, zero padded) without holding the whole matrix.
+        Reads from the spilled memmap if spill_stft() was called for this config.
+        """
+        n_fft = n_fft or self.n_fft
+        hop_length = hop_length or self.hop_length
+        src = self.source_a if slot == 'A' else self.source_b
+        if src is None: return
+        y = src['audio']
+        total = self.n_frames(slot, hop_length)
+        mm = self._spilled.get((slot, n_fft, hop_length))
+        half = n_fft // 2
+        for t0 in range(0, total, block_frames):
+            t1 = min(total, t0 + block_frames)
+            if mm is not None:
+                yield t0, mm[1][t0:t1].T
+                continue
+            # Samples of frames t0..t1-1, zero padded outside the file
+            lo, hi = t0 * hop_length - half, (t1 - 1) * hop_length + n_fft - half
+            seg = y[max(0, lo):min(len(y), hi)]
+            if lo < 0 or hi > len(y):
+                seg = np.pad(seg, (max(0, -lo), max(0, hi - len(y))))
+            yield t0, librosa.stft(seg, n_fft=n_fft, hop_length=hop_length, center=False)
+
+    def spill_stft(self, slot='A', dtype=np.complex64, block_frames=BLOCK_FRAMES, n_fft=None, hop_length=None):
+        """
+        Writes the STFT of a slot block by block to a memory-mapped .npy file
+        (frames, bins) and returns it read-only; later stft_blocks() read from it.
+        complex64 halves the disk size (~6 GB per hour at the default settings).
+        """
+        n_fft = n_fft or self.n_fft
+        hop_length = hop_length or self.hop_length
+        key = (slot, n_fft, hop_length)
+        if key in self._spilled: return self._spilled[key][1]
+        if (self.source_a if slot == 'A' else self.source_b) is None: return None
+        fd, path = tempfile.mkstemp(suffix=".npy", prefix=f"morphcore_{slot}_", dir=self.spill_dir)
+        os.close(fd)
+        try:
+            mm = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                           shape=(self.n_frames(slot, hop_length), 1 + n_fft // 2))
+            for t0, block in self.stft_blocks(slot, block_frames, n_fft, hop_length):
+                mm[t0:t0 + block.shape[1]] = block.T
+            mm.flush()
+            del mm
+        except Exception:
+            os.remove(path)
+            raise
+        self._spilled[key] = (path, np.load(path, mmap_mode='r'))
+        return self._spilled[key][1]
+
+    def clear_spill(self, slot=None):
+        """Deletes spilled spectra of a slot (all slots if None)."""
+        for key in [k for k in self._spilled if slot is None or k[0] == slot]:
+            path, mm = self._spilled.pop(key)
+            del mm
+            try: os.remove(path)
+            except OSError: pass # still mapped somewhere (Windows), left in temp
+
+    def process_blocks(self, fn, slots=('A', 'B'), block_frames=BLOCK_FRAMES, spill=False,
+                       out_path=None, on_block=None, n_fft=None, hop_length=None):
+        """
+        Runs fn(*blocks) -> result spectra block over the slots' STFTs block by block
+        and overlap-adds the result (any MorphProcessors mode, frames cut to the
+        shortest slot like ensure_shape). Memory stays around a few blocks.
+        spill: read the slot STFTs from memmaps (spill_stft), so repeated runs skip the STFT.
+        out_path: stream the audio to a file and return the path; otherwise return the audio.
+        on_block(t0, result block) is called for every block (e.g. spectrogram preview).
+        """
+        n_fft = n_fft or self.n_fft
+        hop_length = hop_length or self.hop_length
+        total = min(self.n_frames(s, hop_length) for s in slots)
+        if total == 0: return None
+        if spill:
+            for s in slots: self.spill_stft(s, block_frames=block_frames, n_fft=n_fft, hop_length=hop_length)
+        ola = BlockISTFT(n_fft, hop_length, total)
+        gens = [self.stft_blocks(s, block_frames, n_fft, hop_length) for s in slots]
+
+        out = None
+        if out_path is not None:
+            out = sf.SoundFile(out_path, 'w', samplerate=self.sr, channels=1)
+        parts = []
+        try:
+            for items in zip(*gens):
+                t0 = items[0][0]
+                if t0 >= total: break
+                blocks = [b[:, :total - t0] for _, b in items]
+                res = fn(*blocks)
+                if on_block is not None: on_block(t0, res)
+                y = ola.push(t0, res)
+                if out is not None: out.write(y)
+                else: parts.append(y)
+            y = ola.finish()
+            if out is not None: out.write(y)
+            else: parts.append(y)
+        finally:
+            if out is not None: out.close()
+        return out_path if out_path is not None else np.concatenate(parts)
+
+    # ---------- Parameter sweeps ----------
+    def render_sweep(self, mode, values, out_dir, prefix="sweep", workers=None, max_bytes=SWEEP_BYTES):
+        """
+        Renders one MorphProcessors mode at every value (MorphProcessors.sweep) and writes
+        <out_dir>/<prefix>_001.wav, _002.wav, ... in value order. The ISTFT + write of each
+        result runs in a thread pool; values are taken in chunks of about max_bytes of spectra.
+        Long sources (is_long) go through process_blocks per value instead.
+        Returns [(path, value), ...].
+        """
+        if mode not in MorphProcessors.SWEEP_MODES: raise ValueError(f"Unknown sweep mode: {mode}")
+        values = np.asarray(values, dtype=np.float64).ravel()
+        os.makedirs(out_dir, exist_ok=True)
+        paths = [os.path.join(out_dir, f"{prefix}_{i + 1:03d}.wav") for i in range(len(values))]
+        slots = ('A',) if mode == "formant_shift" else ('A', 'B')
+        
+        if self.is_long():
+            fn = getattr(MorphProcessors, mode)
+            for path, v in zip(paths, values):
+                if mode == "spectral_blend": f = lambda a, b: fn(a, b, v, self.sr, self.n_fft)
+                elif mode == "formant_shift": f = lambda a: fn(a, v, self.n_fft)
+                else: f = lambda a, b: fn(a, b, v)
+                self.process_blocks(f, slots=slots, spill=True, out_path=path)
+            return list(zip(paths, values.tolist()))
+        
+        polar = [self.get_polar(s) for s in slots]
+        if any(p is None for p in polar): return []
+        if len(polar) == 1: polar.append(None)
+        
+        def write(path, spec):
+            sf.write(path, self.istft(spec), self.sr)
+        
+        frames = min(p.stft.shape[1] for p in polar if p is not None)
+        per_value = polar[0].stft.shape[0] * frames * 16
+        chunk = max(1, int(max_bytes // per_value))
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            for c0 in range(0, len(values), chunk):
+                specs = MorphProcessors.sweep(mode, polar[0], polar[1], values[c0:c0 + chunk], self.sr, self.n_fft)
+                # Wait for the chunk before computing the next one (bounded memory)
+                for fut in [pool.submit(write, paths[c0 + k], specs[k]) for k in range(len(specs))]:
+                    fut.result()
+        return list(zip(paths, values.tolist()))
 
     def get_world(self, slot='A'):
         """Lazy computes WORLD parameters (Heavy)."""
@@ -0,0 +1,103 @@
+import queue
+import threading
+import numpy as np
+import soundfile as sf
+from profiler import stage as profile_stage
+
+
+def trim_bounds(y, top_db=40, frame_length=2048, hop_length=512):
+    """
+    (start, end) sample bounds of the non-silent part of y, (N,) or (N, channels).
+    Same rule as librosa.effects.trim(top_db, ref=np.max): centered RMS frames per
+    channel (loudest channel wins), kept if within top_db of the loudest frame.
+    The frame energies come from one block-sum pass (hop-sized blocks + cumsum)
+    instead of framing the signal.
+    """
+    y2 = y[:, None] if y.ndim == 1 else y
+    n = len(y2)
+    if n == 0: return 0, 0
+
+    num_frames = 1 + n // hop_length
+    half = frame_length // 2
+    # Centered frames: frame k covers [k*hop - half, k*hop + half) with zero padding
+    pad = np.zeros((half + num_frames * hop_length + half, y2.shape[1]), dtype=np.float64)
+    pad[half:half + n] = y2
+    block_energy = np.square(pad).reshape(-1, hop_length, y2.shape[1]).sum(axis=1)
+    csum = np.concatenate((np.zeros((1, y2.shape[1])), np.cumsum(block_energy, axis=0)))
+    blocks_per_frame = frame_length // hop_length
+    energy = (csum[blocks_per_frame:blocks_per_frame + num_frames] - csum[:num_frames]).max(axis=1)
+
+    peak = energy.max()
+    if peak <= 0: return 0, n # all silent: keep the whole signal, like librosa.effects.trim
+    loud = np.flatnonzero(energy > peak * 10.0 ** (-top_db / 10.0))
+    start = int(loud[0] * hop_length)
+    end = min(n, int((loud[-1] + 1) * hop_length))
+    return start, end
+
+
+def trim_silence(y, top_db=40):
+    start, end = trim_bounds(y, top_db)
+    return y[start:end]
+
+
+class AsyncWriter:
+    """
+    Background WAV writer for batch loops: submit() hands the audio to a writer
+    thread and returns, so the next render overlaps the disk I/O. The queue is
+    bounded (back-pressure: submit blocks while max_pending files are waiting).
+    callback(filepath, ok, msg) runs on the writer thread after each write,
+    e.g. for tagging/moving the finished file.
+    profiler: optional StageProfiler, records "write" per file.
+    """
+    def __init__(self, max_pending=4, profiler=None):
+        self.profiler = profiler
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.errors = []
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def submit(self, filepath, data, sr, subtype='PCM_24', callback=None):
+        # The array must not be modified after submit (engine outputs are fresh per render)
+        self._ensure_thread()
+        self._queue.put((filepath, data, sr, subtype, callback))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None: return
+                filepath, data, sr, subtype, callback = item
+                ok, msg = True, "Success"
+                try:
+                    with profile_stage(self.profiler, "write"):
+                        sf.write(filepath, data, sr, subtype=subtype)
+                except Exception as e:
+                    ok, msg = False, str(e)
+                    self.errors.append((filepath, msg))
+                if callback is not None:
+                    try: callback(filepath, ok, msg)
+                    except Exception as e: self.errors.append((filepath, f"callback: {e}"))
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every submitted file is written (and its callback ran)."""
+        if self._thread is not None: self._queue.join()
+
+    def close(self):
+        if self._thread is None: return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,20 +1,136 @@
 import numpy as np
 import scipy.ndimage
+import scipy.sparse
+import threading
+from collections import namedtuple
+
+# Polar form of an STFT (MorphCore.get_polar caches these per slot).
+# Processors take either a complex STFT or a PolarSTFT; phasor = stft / |stft|
+# (exp(1j * phase), 1 where the magnitude is 0). The phase itself is not kept.
+PolarSTFT = namedtuple('PolarSTFT', ['stft', 'mag', 'phasor'])
+
+def unit_phasor(stft, mag):
+    return np.divide(stft, mag, out=np.ones_like(stft), where=mag > 0)
+
+def as_polar(x):
+    if isinstance(x, PolarSTFT): return x
+    mag = np.abs(x)
+    return PolarSTFT(x, mag, unit_phasor(x, mag))
+
+def _complex(x):
+    return x.stft if isinstance(x, PolarSTFT) else x
+
+def _mag(x):
+    return x.mag if isinstance(x, PolarSTFT) else np.abs(x)
+
+
+# ---------- Spectral envelopes (cepstral lifter) ----------
+# Smoothing |X| over frequency = multiplying its FFT along the bin axis (the
+# "quefrency" domain) by a lifter. The magnitude is mirrored to 2*bins first, which
+# is exactly scipy's reflect boundary, and the lifter is the transform of the same
+# truncated gaussian kernel as gaussian_filter1d, so the envelopes match the old
+# gaussian_filter1d ones (to ~1e-15) with one FFT pair per matrix instead of a
+# (8*sigma+1)-tap filter per bin. Short kernels are still filtered directly (faster).
+_lifters = {} # (bins, sigma) -> real lifter (bins + 1,)
+_LIFTER_CACHE_SIZE = 32
+_DIRECT_MAX_SIGMA = 10.0 # below this gaussian_filter1d beats the FFT pair (1025 bins)
+_lifter_lock = threading.Lock()
+
+def gaussian_lifter(bins, sigma, truncate=4.0):
+    key = (int(bins), float(sigma))
+    with _lifter_lock:
+        lifter = _lifters.pop(key, None)
+        if lifter is not None:
+            _lifters[key] = lifter # most recent last
+            return lifter
+    radius = int(truncate * float(sigma) + 0.5)
+    x = np.arange(-radius, radius + 1)
+    w = np.exp(-0.5 / (float(sigma) ** 2) * x ** 2)
+    w /= w.sum()
+    kernel = np.zeros(2 * bins)
+    np.add.at(kernel, x % (2 * bins), w) # wraps like repeated reflection
+    lifter = np.fft.rfft(kernel).real # symmetric kernel -> real lifter
+    lifter.setflags(write=False)
+    with _lifter_lock:
+        _lifters[key] = lifter
+        while len(_lifters) > _LIFTER_CACHE_SIZE:
+            _lifters.pop(next(iter(_lifters)))
+    return lifter
+
+def quefrency(mag):
+    """FFT of the mirrored magnitude along bins: (bins + 1, frames); shared by every smoothness."""
+    return np.fft.rfft(np.concatenate((mag, mag[::-1]), axis=0), axis=0)
+
+def spectral_envelope(mag, smoothness, q=None):
+    """Gaussian-smoothed magnitude over frequency (sigma = smoothness bins), via the lifter."""
+    bins = mag.shape[0]
+    if q is None:
+        if smoothness < _DIRECT_MAX_SIGMA:
+            return scipy.ndimage.gaussian_filter1d(mag, sigma=smoothness, axis=0)
+        q = quefrency(mag)
+    lifter = gaussian_lifter(bins, smoothness)
+    return np.fft.irfft(q * lifter[:, np.newaxis], n=2 * bins, axis=0)[:bins].astype(mag.dtype, copy=False)
+
+# ---------- Formant resampling tables ----------
+# Linear interpolation over the bin axis as a sparse (bins, bins) matrix with two
+# weights per row, cached per (shift, bins): applying it is one sparse matmul
+# instead of rebuilding floor/ceil/alpha and gathering twice. Shared with
+# AudioEngine._apply_formant_shift (WORLD envelopes).
+_formant_tables = {} # (shift, bins, clip_positions) -> csr matrix
+_FORMANT_CACHE_SIZE = 32
+_formant_lock = threading.Lock()
+
+def formant_matrix(shift, bins, clip_positions=True):
+    """
+    Row j reads source position j / shift.
+    clip_positions=True : position clipped to the last bin first (MorphProcessors.formant_shift)
+    clip_positions=False: indices clipped after flooring, alpha kept (AudioEngine, j * (1 / shift))
+    """
+    key = (float(shift), int(bins), bool(clip_positions))
+    with _formant_lock:
+        table = _formant_tables.pop(key, None)
+        if table is not None:
+            _formant_tables[key] = table # most recent last
+            return table
+    x = np.arange(bins)
+    if clip_positions:
+        x_new = np.clip(x / shift, 0, bins-1)
+        x_l = np.floor(x_new).astype(int)
+        x_h = np.ceil(x_new).astype(int)
+        alpha = x_new - x_l
+    else:
+        x_new = x * (1.0 / shift)
+        x_l = np.floor(x_new).astype(int)
+        x_h = np.ceil(x_new).astype(int)
+        alpha = x_new - x_l
+        x_l = np.clip(x_l, 0, bins-1)
+        x_h = np.clip(x_h, 0, bins-1)
+    table = scipy.sparse.csr_matrix((np.concatenate((1.0 - alpha, alpha)),
+                                     (np.concatenate((x, x)), np.concatenate((x_l, x_h)))), shape=(bins, bins))
+    with _formant_lock:
+        _formant_tables[key] = table
+        while len(_formant_tables) > _FORMANT_CACHE_SIZE:
+            _formant_tables.pop(next(iter(_formant_tables)))
+    return table
 
 class MorphProcessors:
     
     @staticmethod
     def ensure_shape(a, b):
-        """Truncates to minimum common shape (frames)."""
-        min_cols = min(a.shape[1], b.shape[1])
-        return a[:, :min_cols], b[:, :min_cols]
+        """Truncates to minimum common shape (frames). Works on PolarSTFTs too (None fields stay None)."""
+        min_cols = min(_complex(a).shape[1], _complex(b).shape[1])
+        if isinstance(a, PolarSTFT): a = PolarSTFT(*(v if v is None else v[:, :min_cols] for v in a))
+        else: a = a[:, :min_cols]
+        if isinstance(b, PolarSTFT): b = PolarSTFT(*(v if v is None else v[:, :min_cols] for v in b))
+        else: b = b[:, :min_cols]
+        return a, b
 
     @staticmethod
     def spectral_blend(stft_a, stft_b, split_freq_hz, sr, n_fft):
         """
         Mixes Low Freqs of A with High Freqs of B.
         """
-        a, b = MorphProcessors.ensure_shape(stft_a, stft_b)
+        a, b = MorphProcessors.ensure_shape(_complex(stft_a), _complex(stft_b))
         
         freqs = np.linspace(0, sr/2, 1 + n_fft//2)
         # Find bin index
@@ -43,9 +159,12 @@ class MorphProcessors:
         mix: 0.0 (A) -> 1.0 (B)
         """
         a, b = MorphProcessors.ensure_shape(stft_a, stft_b)
+        # Only the dominant side's phase is used (see below)
+        if mix < 0.5: a = as_polar(a)
+        else: b = as_polar(b)
         
-        mag_a = np.abs(a)
-        mag_b = np.abs(b)
+        mag_a = _mag(a)
+        mag_b = _mag(b)
         
         # Interpolate Magnitude
         mag_mix = mag_a * (1.0 - mix) + mag_b * mix
@@ -54,32 +173,33 @@ class MorphProcessors:
         # Or simple hard switch at 0.5?
         # Hard switch is safer for transients.
         if mix < 0.5:
-            phase = np.angle(a)
+            phasor = a.phasor
         else:
-            phase = np.angle(b)
+            phasor = b.phasor
             
-        return mag_mix * np.exp(1j * phase)
+        return mag_mix * phasor
 
     @staticmethod
-    def cross_synthesis(stft_carrier, stft_modulator, envelope_smoothness=10):
+    def cross_synthesis(stft_carrier, stft_modulator, envelope_smoothness=10, env_carrier=None, env_modulator=None):
         """
         Imprints spectral envelope of Modulator onto Carrier.
+        env_carrier / env_modulator: precomputed envelopes (MorphCore.get_envelope) to skip the smoothing.
         """
         c, m = MorphProcessors.ensure_shape(stft_carrier, stft_modulator)
-        
-        mag_c = np.abs(c)
-        mag_m = np.abs(m)
+        cols = _complex(c).shape[1]
         
         # 1. Extract Envelope from Modulator
-        # Simple method: Gaussian filter over frequency axis
-        env_m = scipy.ndimage.gaussian_filter1d(mag_m, sigma=envelope_smoothness, axis=0)
+        # Gaussian smoothing over frequency (cepstral lifter, see spectral_envelope)
+        if env_modulator is None: env_m = spectral_envelope(_mag(m), envelope_smoothness)
+        else: env_m = env_modulator[:, :cols]
         
         # 2. Flatten Carrier (Whitening)
-        env_c = scipy.ndimage.gaussian_filter1d(mag_c, sigma=envelope_smoothness, axis=0)
+        if env_carrier is None: env_c = spectral_envelope(_mag(c), envelope_smoothness)
+        else: env_c = env_carrier[:, :cols]
         # Avoid div by zero
         env_c = np.maximum(env_c, 1e-6)
         
-        whitened_c = c / env_c
+        whitened_c = _complex(c) / env_c
         
         # 3. Apply Modulator Envelope
         result = whitened_c * env_m
@@ -92,46 +212,79 @@ class MorphProcessors:
         shift > 1.0: Spectrum stretches up (Smurf/High) - actually shift UP means formants move UP => Higher timbre.
         shift < 1.0: Spectrum shrinks down (Giant/Low).
         """
-        mag = np.abs(stft_src)
-        phase = np.angle(stft_src)
-        
-        rows, cols = mag.shape
-        
-        # X-axis (Frequency bins)
-        x = np.arange(rows)
+        src = as_polar(stft_src)
         
-        # New X-axis (Inverse of shift)
         # If we want to shift Formants UP (x2), we need to grab data from LOWER frequencies.
-        # Wait: Moving Formant at 500Hz to 1000Hz (Shift=2.0). 
-        # Current bin 100 needs data from bin 50.
-        x_new = x / shift 
+        # Moving Formant at 500Hz to 1000Hz (Shift=2.0): bin 100 needs data from bin 50.
+        # Linear interpolation (cached sparse table, see formant_matrix)
+        new_mag = formant_matrix(shift, src.mag.shape[0]) @ src.mag
         
-        # Interpolate for each column is slow in Python loop.
-        # Use map_coordinates for heavy vectorization?
-        # Or just simple per-column interpolation if fast enough. 
-        # Let's use a simple per-column resize logic or approximate for speed.
-        
-        new_mag = np.zeros_like(mag)
+        return new_mag * src.phasor
+
+
+    # ---------- Parameter sweeps ----------
+    SWEEP_MODES = ("spectral_blend", "interpolate", "cross_synthesis", "formant_shift")
+
+    @staticmethod
+    def sweep(mode, stft_a, stft_b, values, sr=48000, n_fft=2048):
+        """
+        All results of one mode over an array of parameter values: (len(values), bins, frames).
+        mode: "spectral_blend" (split Hz), "interpolate" (mix), "cross_synthesis" (smoothness)
+        or "formant_shift" (shift, stft_b unused). Each slice equals the single-value call.
+        Per-value tables (masks, cached formant matrices) are built up front and magnitude /
+        phasor are shared; the big arithmetic is written slice by slice into the preallocated
+        result (a fully broadcast temporary was slower, this is memory bound).
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
         
-        # Vectorized interpolation? 
-        # We can treat this as an image resize on Axis 0.
-        # scipy.ndimage.zoom is easy but fixed grid.
-        # Let's try row-mapping.
+        if mode == "formant_shift":
+            src = as_polar(stft_a)
+            out = None
+            for i, shift in enumerate(values):
+                new_mag = formant_matrix(shift, src.mag.shape[0]) @ src.mag
+                if out is None: out = np.empty((len(values),) + new_mag.shape, dtype=np.result_type(new_mag, src.phasor))
+                np.multiply(new_mag, src.phasor, out=out[i])
+            return out
         
-        # Limit to valid range
-        x_new = np.clip(x_new, 0, rows-1)
+        a, b = MorphProcessors.ensure_shape(stft_a, stft_b)
         
-        # Nearest neighbor for extreme speed? No, sound bad. Linear.
-        # Linear Interp:
-        x_l = np.floor(x_new).astype(int)
-        x_h = np.ceil(x_new).astype(int)
-        alpha = (x_new - x_l)[:, np.newaxis] # broadcast to cols
+        if mode == "spectral_blend":
+            a, b = _complex(a), _complex(b)
+            freqs = np.linspace(0, sr/2, 1 + n_fft//2)
+            split_idx = np.searchsorted(freqs, values)
+            mask = (np.arange(a.shape[0])[np.newaxis, :] < split_idx[:, np.newaxis]).astype(np.float64)
+            # Same 3-bin edge as spectral_blend
+            for k, idx in enumerate(split_idx):
+                if idx > 1 and idx < a.shape[0]-2:
+                    mask[k, idx-1:idx+2] = (0.75, 0.5, 0.25)
+            mask = mask[:, :, np.newaxis]
+            out = np.empty((len(values),) + a.shape, dtype=np.result_type(a, b, mask))
+            tmp = np.empty(a.shape, dtype=out.dtype)
+            for i in range(len(values)):
+                np.multiply(a, mask[i], out=out[i])
+                out[i] += np.multiply(b, 1.0 - mask[i], out=tmp)
+            return out
         
-        # Gather
-        val_l = mag[x_l, :] # advanced indexing
-        val_h = mag[x_h, :]
+        if mode == "interpolate":
+            a, b = as_polar(a), as_polar(b)
+            out = np.empty((len(values),) + a.mag.shape, dtype=np.result_type(a.mag, b.mag, a.phasor, b.phasor))
+            mag_mix, tmp = np.empty(a.mag.shape, dtype=np.result_type(a.mag, b.mag)), np.empty_like(b.mag)
+            for i, mix in enumerate(values):
+                np.multiply(a.mag, 1.0 - mix, out=mag_mix)
+                mag_mix += np.multiply(b.mag, mix, out=tmp)
+                np.multiply(mag_mix, a.phasor if mix < 0.5 else b.phasor, out=out[i])
+            return out
         
-        new_mag = val_l * (1.0 - alpha) + val_h * alpha
+        if mode == "cross_synthesis":
+            # One quefrency transform per side, then only lifter + inverse per value
+            mag_c, mag_m = _mag(a), _mag(b)
+            q_c, q_m = quefrency(mag_c), quefrency(mag_m)
+            out = None
+            for i, smooth in enumerate(values):
+                res = MorphProcessors.cross_synthesis(a, b, smooth, env_carrier=spectral_envelope(mag_c, smooth, q_c),
+                                                      env_modulator=spectral_envelope(mag_m, smooth, q_m))
+                if out is None: out = np.empty((len(values),) + res.shape, dtype=res.dtype)
+                out[i] = res
+            return out
         
-        return new_mag * np.exp(1j * phase)
-
+        raise ValueError(f"Unknown sweep mode: {mode}")
@@ -0,0 +1,131 @@
+import csv
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class StageProfiler:
+    """
+    Opt-in per-stage wall time / peak allocation recorder for batch renders.
+    Attach it to an engine (engine.profiler = prof) and every instrumented stage
+    (load, analyze, align, morph, synthesize, pitch, stretch, fx.*, trim, write, ...)
+    is recorded; stats aggregate over the whole batch.
+
+    memory=True traces Python/numpy allocations with tracemalloc (slower, so only
+    when asked). Peaks are "above the level at stage entry"; nested stages are
+    handled, but the writer thread shares the process-wide peak, and work done in
+    pool processes (parallel analysis / synthesis) is not traced.
+    """
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.records = {} # stage -> ([seconds, ...], [peak bytes, ...])
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._own_tracing = False
+        self._t_start = time.perf_counter()
+        self._t_stop = None
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._stack()
+        mem = self.memory and tracemalloc.is_tracing()
+        entry = [0, 0] # traced bytes at entry, peak seen so far
+        if mem:
+            cur, peak = tracemalloc.get_traced_memory()
+            # Keep the outer stage's peak before resetting it for this one
+            if stack: stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            entry = [cur, cur]
+        stack.append(entry)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            stack.pop()
+            peak_bytes = 0
+            if mem and tracemalloc.is_tracing():
+                peak = max(entry[1], tracemalloc.get_traced_memory()[1])
+                peak_bytes = max(0, peak - entry[0])
+                if stack: stack[-1][1] = max(stack[-1][1], peak)
+            self.add(name, dt, peak_bytes)
+
+    def add(self, name, seconds, peak_bytes=0):
+        with self._lock:
+            times, peaks = self.records.setdefault(name, ([], []))
+            times.append(seconds)
+            peaks.append(peak_bytes)
+
+    def merge(self, records):
+        """Adds the records of another profiler (e.g. returned by a worker process)."""
+        for name, (times, peaks) in records.items():
+            with self._lock:
+                own = self.records.setdefault(name, ([], []))
+                own[0].extend(times)
+                own[1].extend(peaks)
+
+    def close(self):
+        """Stops the wall clock (and tracemalloc if this profiler started it)."""
+        if self._t_stop is None: self._t_stop = time.perf_counter()
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+    @property
+    def wall(self):
+        return (self._t_stop or time.perf_counter()) - self._t_start
+
+    # --- Report ---
+    def stats(self):
+        wall = self.wall
+        rows = []
+        with self._lock:
+            items = [(k, list(t), list(p)) for k, (t, p) in self.records.items()]
+        for name, times, peaks in items:
+            total = sum(times)
+            rows.append({
+                "stage": name,
+                "calls": len(times),
+                "total_s": round(total, 4),
+                "mean_ms": round(total / len(times) * 1000.0, 2),
+                "max_ms": round(max(times) * 1000.0, 2),
+                "peak_mb": round(max(peaks) / 1e6, 2),
+                "wall_pct": round(total / wall * 100.0, 1) if wall > 0 else 0.0,
+            })
+        return rows
+
+    def summary(self):
+        lines = [f"Stage profile ({self.wall:.1f}s wall)",
+                 f"{'stage':<16}{'calls':>6}{'total s':>9}{'mean ms':>10}{'max ms':>10}{'peak MB':>9}{'wall %':>8}"]
+        for r in self.stats():
+            lines.append(f"{r['stage']:<16}{r['calls']:>6}{r['total_s']:>9.2f}{r['mean_ms']:>10.1f}"
+                         f"{r['max_ms']:>10.1f}{r['peak_mb']:>9.1f}{r['wall_pct']:>8.1f}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        """Writes the stats as CSV (.csv) or JSON (anything else)."""
+        rows = self.stats()
+        if path.lower().endswith(".csv"):
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                w = csv.DictWriter(f, fieldnames=["stage", "calls", "total_s", "mean_ms", "max_ms", "peak_mb", "wall_pct"])
+                w.writeheader()
+                w.writerows(rows)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"wall_s": round(self.wall, 3), "stages": rows}, f, indent=2)
+
+
+def stage(profiler, name):
+    """profiler.stage(name), or a no-op context when profiling is off."""
+    return profiler.stage(name) if profiler is not None else nullcontext()
@@ -206,6 +206,13 @@ class ProtoMorphApp(ctk.CTk):
         self.btn_export = ctk.CTkButton(self.frame_actions, text="EXPORT WAV", width=120, fg_color="green", command=self.export_render)
         self.btn_export.pack(side="left", padx=10)
         
+        # Sweep: renders the current mode over its whole slider range as numbered files
+        self.entry_sweep = ctk.CTkEntry(self.frame_actions, width=40)
+        self.entry_sweep.insert(0, "8")
+        self.entry_sweep.pack(side="left", padx=(10, 2))
+        self.btn_sweep = ctk.CTkButton(self.frame_actions, text="SWEEP", width=80, command=self.run_sweep)
+        self.btn_sweep.pack(side="left", padx=(2, 10))
+        
     # ... (Keep _build_source_loader) ...
 
     # ... (Keep _build_controls) ...
@@ -385,9 +392,17 @@ class ProtoMorphApp(ctk.CTk):
     def _process_worker(self):
         mode = self.current_mode.get()
         
+        # Long files: block-wise STFT with the spectra spilled to disk (bounded memory)
+        if self.core.is_long():
+            self._process_long(mode)
+            return
+        
         # Ensure STFTs (Lazy load triggers here)
-        stft_a = self.core.get_stft('A')
-        stft_b = self.core.get_stft('B') # Might be None use case dependent
+        # Cached polar forms: a slider sweep only redoes the blend arithmetic.
+        # Cross Synthesis only uses the complex STFT + envelopes, so no phasor is built for it
+        get = self.core.get_stft if mode == "Cross Synthesis" else self.core.get_polar
+        stft_a = get('A')
+        stft_b = get('B') # Might be None use case dependent
         
         if stft_a is None:
              print("Source A missing!")
@@ -409,7 +424,10 @@ class ProtoMorphApp(ctk.CTk):
             elif mode == "Cross Synthesis":
                 if stft_b is None: return
                 smooth = self.slider_smooth.get()
-                result_stft = MorphProcessors.cross_synthesis(stft_a, stft_b, smooth)
+                # Envelopes are cached per source + smoothness
+                result_stft = MorphProcessors.cross_synthesis(stft_a, stft_b, smooth,
+                                                              env_carrier=self.core.get_envelope('A', smooth),
+                                                              env_modulator=self.core.get_envelope('B', smooth))
                 
             elif mode == "Formant Shifter":
                 shift = self.slider_shift.get()
@@ -447,6 +465,70 @@ class ProtoMorphApp(ctk.CTk):
         except Exception as e:
             print(f"Processing Error: {e}")
 
+    # Mode -> (MorphProcessors.sweep mode, slider range)
+    SWEEP_MODES = {
+        "Spectrum Blender": ("spectral_blend", 0, 10000),
+        "Interpolator": ("interpolate", 0.0, 1.0),
+        "Cross Synthesis": ("cross_synthesis", 1, 50),
+        "Formant Shifter": ("formant_shift", 0.5, 2.0),
+    }
+
+    def run_sweep(self):
+        try: steps = max(2, int(self.entry_sweep.get()))
+        except ValueError: steps = 8
+        mode, lo, hi = self.SWEEP_MODES[self.current_mode.get()]
+        out_dir = os.path.join("output", f"sweep_{int(time.time())}")
+        self.btn_sweep.configure(state="disabled")
+        
+        def worker():
+            try:
+                results = self.core.render_sweep(mode, np.linspace(lo, hi, steps), out_dir, prefix=mode)
+                for path, v in results:
+                    print(f"{os.path.basename(path)}: {v:g}")
+                print(f"Sweep: {len(results)} files in {out_dir}")
+            except Exception as e:
+                print(f"Sweep Error: {e}")
+            finally:
+                self.after(0, lambda: self.btn_sweep.configure(state="normal"))
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _process_long(self, mode):
+        core = self.core
+        if core.source_a is None:
+             print("Source A missing!")
+             return
+        if mode == "Spectrum Blender":
+            split = self.slider_split.get()
+            fn = lambda a, b: MorphProcessors.spectral_blend(a, b, split, core.sr, core.n_fft)
+        elif mode == "Interpolator":
+            mix = self.slider_mix.get()
+            fn = lambda a, b: MorphProcessors.interpolate(a, b, mix)
+        elif mode == "Cross Synthesis":
+            smooth = self.slider_smooth.get()
+            fn = lambda a, b: MorphProcessors.cross_synthesis(a, b, smooth)
+        elif mode == "Formant Shifter":
+            shift = self.slider_shift.get()
+            fn = lambda a: MorphProcessors.formant_shift(a, shift, core.n_fft)
+        else: return
+        slots = ('A',) if mode == "Formant Shifter" else ('A', 'B')
+        if core.source_b is None and len(slots) == 2: return
+        
+        # Spectrogram preview: every n-th frame (~1000 columns)
+        step = max(1, core.n_frames('A') // 1000)
+        cols = []
+        def keep(t0, block):
+            cols.append(block[:, (-t0) % step::step])
+        
+        try:
+            print(f"Long source: block processing ({mode})...")
+            y = core.process_blocks(fn, slots=slots, spill=True, on_block=keep)
+            self.last_audio = y
+            preview = np.concatenate(cols, axis=1) if cols else None
+            self.viz.after(0, lambda: self.viz.draw_spectrogram(preview))
+            self._play_audio(y)
+        except Exception as e:
+            print(f"Processing Error: {e}")
+
     def _play_audio(self, y):
         # Generate unique temp filename to avoid Windows file locking issues
         timestamp = int(time.time() * 1000)
@@ -7,7 +7,7 @@ def run_tests():
     
     # 1. Imports
     try:
-        print("[1/5] Importing modules...")
+        print("[1/6] Importing modules...")
         import morph_core
         import processors
         # Mocking pygame for headless/CI envs just in case
@@ -20,7 +20,7 @@ def run_tests():
 
     # 2. Core Init
     try:
-        print("[2/5] Initializing MorphCore...")
+        print("[2/6] Initializing MorphCore...")
         core = morph_core.MorphCore()
         print(f"   -> Success (SR={core.sr}, FFT={core.n_fft})")
     except Exception as e:
@@ -29,7 +29,7 @@ def run_tests():
 
     # 3. Dummy Data Generation
     try:
-        print("[3/5] Generating Dummy STFT Data...")
+        print("[3/6] Generating Dummy STFT Data...")
         # Create fake STFT matrix: (1025 bins, 100 frames) - complex64
         bins = 1025
         frames = 100
@@ -42,7 +42,7 @@ def run_tests():
 
     # 4. Processor Tests
     try:
-        print("[4/5] Testing Processors...")
+        print("[4/6] Testing Processors...")
         
         # Blend
         blend = processors.MorphProcessors.spectral_blend(stft_a, stft_b, 1000, 48000, 2048)
@@ -64,9 +64,38 @@ def run_tests():
         traceback.print_exc()
         return False
 
-    # 5. Real-time Engine Init Test
+    # 5. Spectra Cache (2 x 40 s sources: both slots must stay cached)
     try:
-        print("[5/5] Testing RealtimeEngine Init...")
+        print("[5/6] Testing MorphCore spectra cache...")
+        import tempfile
+        import soundfile as sf
+        tmp = tempfile.mkdtemp()
+        for slot in ('A', 'B'):
+            path = os.path.join(tmp, f"{slot}.wav")
+            sf.write(path, np.random.randn(40 * core.sr) * 0.1, core.sr)
+            ok, msg = core.load_source(path, slot)
+            if not ok: raise ValueError(f"Load failed: {msg}")
+        first = [core.get_polar(slot) for slot in ('A', 'B')]
+        second = [core.get_polar(slot) for slot in ('A', 'B')]
+        for p1, p2 in zip(first, second):
+            if any(a is not b for a, b in zip(p1, p2)): raise ValueError("Second get_polar was not a cache hit")
+        # Cross Synthesis (stft + envelopes) with the budget of sources at the spill threshold
+        core.clear_spectra()
+        core.max_spectra_bytes = 2 * core.n_frames('A') * (1 + core.n_fft // 2) * morph_core.SPECTRA_CELL_BYTES
+        cross = lambda smooth: [(core.get_stft(s), core.get_mag(s), core.get_envelope(s, smooth)) for s in ('A', 'B')]
+        first, second = cross(10), cross(10)
+        moved = [cross(smooth) for smooth in (20, 30, 40)] # slider moves: only the envelopes are new
+        for c1, c2, *cs in zip(first, second, *moved):
+            if any(a is not b for a, b in zip(c1, c2)) or any(c[i] is not c1[i] for c in cs for i in (0, 1)):
+                raise ValueError("Second cross synthesis pass was not a cache hit")
+        print(f"   -> Success ({core._spectra_bytes / 1e6:.0f} MB cached)")
+    except Exception as e:
+        print(f"   -> FAILED: {e}")
+        return False
+
+    # 6. Real-time Engine Init Test
+    try:
+        print("[6/6] Testing RealtimeEngine Init...")
         import realtime_engine
         rt = realtime_engine.RealtimeEngine(sr=48000)
         # We won't start stream as it requires audio device, just check logic
@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+import numpy as np
+
+# ==================== SHAPES ====================
+# A shape is fn(t, speed_hz) -> (x, y) on the XY pad (clipped to 0-1 afterwards),
+# t = frame times in seconds. Random shapes draw from np.random on every call
+# (batch renders seed it per sample) and are never cached.
+
+def _static(t, speed_hz):
+    return np.full(len(t), 0.5), np.full(len(t), 0.5)
+
+def _random_point(t, speed_hz):
+    # Just one random point for the whole duration
+    rx = np.random.rand()
+    ry = np.random.rand()
+    return np.full(len(t), rx), np.full(len(t), ry)
+
+def _circle(t, speed_hz):
+    omega = 2 * np.pi * speed_hz
+    return 0.5 + 0.4 * np.cos(omega * t), 0.5 + 0.4 * np.sin(omega * t)
+
+def _eight(t, speed_hz):
+    omega = 2 * np.pi * speed_hz
+    return 0.5 + 0.4 * np.sin(omega * t), 0.5 + 0.4 * np.sin(2 * omega * t)
+
+def _scan(t, speed_hz):
+    period = 1.0 / max(0.1, speed_hz)
+    phase = (t % period) / period
+    return phase, phase
+
+def _random_movement(t, speed_hz):
+    # True random trajectory each time: multiple sines with random phases
+    p1 = np.random.rand() * 2 * np.pi
+    p2 = np.random.rand() * 2 * np.pi
+    p3 = np.random.rand() * 2 * np.pi
+    p4 = np.random.rand() * 2 * np.pi
+    x = 0.5 + 0.2*np.sin(2*np.pi*speed_hz*t + p1) + 0.15*np.sin(2*np.pi*speed_hz*1.3*t + p2)
+    y = 0.5 + 0.2*np.cos(2*np.pi*speed_hz*0.9*t + p3) + 0.15*np.cos(2*np.pi*speed_hz*1.7*t + p4)
+    return x, y
+
+
+_shapes = {} # name -> (fn, random, uses_speed)
+_lock = threading.Lock()
+
+def register_shape(name, fn, random=False, uses_speed=True):
+    """Adds (or replaces) a shape; cached tables of a replaced shape are dropped."""
+    with _lock:
+        _shapes[name] = (fn, random, uses_speed)
+        for key in [k for k in _tables if k[0] == name]:
+            del _tables[key]
+
+for _name, _fn, _rand, _speed in (("Static", _static, False, False), ("RandomPoint", _random_point, True, False),
+                                  ("Circle", _circle, False, True), ("Eight", _eight, False, True),
+                                  ("Scan", _scan, False, True), ("RandomMovement", _random_movement, True, True)):
+    _shapes[_name] = (_fn, _rand, _speed)
+
+BUILTIN_SHAPES = tuple(_shapes)
+
+def shape_names():
+    return list(_shapes)
+
+def user_shapes():
+    return [name for name in _shapes if name not in BUILTIN_SHAPES]
+
+def is_random(name):
+    entry = _shapes.get(name)
+    return entry is not None and entry[1]
+
+
+# ==================== USER PATHS ====================
+# Drawn on the XY pad or loaded from a file: (N, 2) points in pad coordinates.
+
+def register_path(name, points, loop=False):
+    """
+    Registers a user path as a shape.
+    loop=False: the path is stretched over the whole sound (speed is ignored).
+    loop=True : the path repeats speed_hz times per second (like Scan).
+    """
+    if name in BUILTIN_SHAPES: raise ValueError(f"Built-in shape name: {name}")
+    pts = np.clip(np.asarray(points, dtype=np.float64).reshape(-1, 2), 0.0, 1.0)
+    if len(pts) == 0: raise ValueError("Empty trajectory")
+    if len(pts) == 1: pts = np.repeat(pts, 2, axis=0)
+    pos = np.linspace(0.0, 1.0, len(pts))
+
+    def path(t, speed_hz):
+        if loop:
+            period = 1.0 / max(0.1, speed_hz)
+            phase = (t % period) / period
+        else:
+            phase = np.linspace(0.0, 1.0, len(t))
+        return np.interp(phase, pos, pts[:, 0]), np.interp(phase, pos, pts[:, 1])
+
+    path.points = pts
+    path.loop = loop
+    register_shape(name, path, uses_speed=loop)
+    return name
+
+def path_points(name):
+    """(points, loop) of a user path, or None."""
+    entry = _shapes.get(name)
+    if entry is None or not hasattr(entry[0], 'points'): return None
+    return entry[0].points, entry[0].loop
+
+def load_path(filepath, name=None):
+    """
+    Loads a trajectory file and registers it (name defaults to the file name).
+    .json: {"points": [[x, y], ...], "loop": false, "name": "..."} or a bare point list
+    other: CSV / text with x, y per line (a header line is skipped)
+    """
+    loop = False
+    if filepath.lower().endswith(".json"):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            points = data.get("points", [])
+            loop = bool(data.get("loop", False))
+            name = name or data.get("name")
+        else: points = data
+    else:
+        points = []
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                cells = line.replace(',', ' ').replace(';', ' ').split()
+                if len(cells) < 2: continue
+                try: points.append((float(cells[0]), float(cells[1])))
+                except ValueError: continue # header
+    name = name or os.path.splitext(os.path.basename(filepath))[0]
+    return register_path(name, points, loop=loop)
+
+def save_path(filepath, name):
+    """Writes a registered user path as JSON (load_path format)."""
+    info = path_points(name)
+    if info is None: raise ValueError(f"Not a user path: {name}")
+    points, loop = info
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump({"name": name, "loop": loop, "points": np.round(points, 5).tolist()}, f)
+
+
+# ==================== WEIGHT TABLES ====================
+# Deterministic shapes are computed once per (shape, speed, frames, frame period)
+# and shared (read-only) by every morph, draft, stream and batch render.
+
+_tables = {} # key -> (x, y, weights)
+_TABLE_CACHE_SIZE = 64
+
+def bilinear_weights(mx, my):
+    # (4, frames): A, B, C, D corners of the XY pad
+    wa = (1.0 - mx) * (1.0 - my)
+    wb = mx * (1.0 - my)
+    wc = (1.0 - mx) * my
+    wd = mx * my
+    return np.stack((wa, wb, wc, wd))
+
+def _compute(fn, speed_hz, num_frames, frame_period):
+    t = np.linspace(0, num_frames * (frame_period / 1000.0), num_frames)
+    x, y = fn(t, speed_hz)
+    return np.clip(x, 0, 1), np.clip(y, 0, 1)
+
+def weight_table(shape, speed_hz, num_frames, frame_period):
+    """(x, y, weights (4, frames)) of a shape; read-only and cached unless the shape is random."""
+    entry = _shapes.get(shape)
+    if entry is None: raise ValueError(f"Unknown trajectory shape: {shape}")
+    fn, rand, uses_speed = entry
+    if rand:
+        x, y = _compute(fn, speed_hz, num_frames, frame_period)
+        return x, y, bilinear_weights(x, y)
+
+    # Shapes that ignore speed (stretched paths, Static) share one table per length
+    key = (shape, float(speed_hz) if uses_speed else None, int(num_frames), float(frame_period))
+    with _lock:
+        table = _tables.pop(key, None)
+        if table is not None:
+            _tables[key] = table # most recent last
+            return table
+    x, y = _compute(fn, speed_hz, num_frames, frame_period)
+    w = bilinear_weights(x, y)
+    for arr in (x, y, w): arr.setflags(write=False)
+    table = (x, y, w)
+    with _lock:
+        _tables[key] = table
+        while len(_tables) > _TABLE_CACHE_SIZE:
+            _tables.pop(next(iter(_tables)))
+    return table
+
+def trajectory(shape, speed_hz, num_frames, frame_period):
+    x, y, _ = weight_table(shape, speed_hz, num_frames, frame_period)
+    return x, y